@@ -1,58 +1,423 @@
 # Tokenized bond lifecycle demo
 # - Issue a bond, track coupons, allow transfers, and redeem at maturity
 # - Very small simulation to show how financial instruments can be tokenized
+# - BondPortfolio: thousands of bond series and millions of holder positions in
+#   NumPy arrays; coupon schedules with day-count conventions and all coupon /
+#   redemption cash flows of a date range computed in one vectorised sweep
+# - HolderRegistry: holder ids -> dense indices, balances in paged NumPy arrays
+#   with copy-on-write snapshots at coupon record dates
 #
-# Run: python3 bonds_example.py
+# Run: python3 bonds_example.py [--bench]
 
+import argparse
 import time
+from collections import defaultdict, namedtuple
 from datetime import datetime, timedelta
 
+import numpy as np
+
+PAGE_BITS, DIR_BITS = 2, 6                  # 4 balances per page, 64 pages per directory
+PAGE_MASK, DIR_MASK = (1 << PAGE_BITS) - 1, (1 << DIR_BITS) - 1
+DIR_SHIFT = PAGE_BITS + DIR_BITS
+
+class RegistrySnapshot:
+    # Frozen view of a HolderRegistry: just the list of directory rows that were
+    # current when it was taken. Rows are never modified once a newer generation
+    # exists, so a balance lookup is O(1): pages[dirs[top[t], m], offset].
+    def __init__(self, registry, label):
+        self.registry = registry
+        self.label = label
+        self.top = list(registry.top)
+        self.size = len(registry.names)
+
+    def get(self, holder, default=0):
+        i = self.registry.index.get(holder)
+        if i is None or i >= self.size:
+            return default
+        return self.registry._read(self.top, i)
+
+    def balances(self):
+        # dense array, entry i = balance of holder index i at the snapshot
+        return self.registry._dense(self.top, self.size)
+
+    def items(self):
+        return zip(self.registry.names[:self.size], self.balances().tolist())
+
+class HolderRegistry:
+    # Holder ids map to dense integer indices. Balances live in a pool of small
+    # pages (rows of `pages`), addressed through directories (rows of `dirs`)
+    # listed in `top` -- a two-level copy-on-write array.
+    # Each page and directory row records the generation that wrote it;
+    # snapshot() starts a new generation, and the first later write to an older
+    # row copies just that row. Memory therefore grows with the positions changed
+    # after each record date (one 4-entry page, plus its directory once per
+    # generation), not with the number of holders.
+    def __init__(self):
+        self.index = {}
+        self.names = []
+        self.generation = 0
+        self.pages = np.zeros((1024, PAGE_MASK + 1), dtype=np.int64)   # row 0: shared zero page
+        self.page_gen = np.full(1024, -1, dtype=np.int64)
+        self.n_pages = 1
+        self.dirs = np.zeros((16, DIR_MASK + 1), dtype=np.int32)
+        self.dir_gen = np.full(16, -1, dtype=np.int64)
+        self.n_dirs = 0
+        self.top = []
+        self.snapshots = {}                 # record date -> RegistrySnapshot
+        self.pages_copied = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def _new_row(self, table, gen, n, source):
+        # append a copy of row `source` to a row pool, doubling its capacity when full
+        rows, gens = getattr(self, table), getattr(self, table[:-1] + "_gen")
+        if n == len(rows):
+            rows = np.concatenate([rows, np.zeros_like(rows)])
+            gens = np.concatenate([gens, np.full(len(gens), -1, dtype=np.int64)])
+            setattr(self, table, rows)
+            setattr(self, table[:-1] + "_gen", gens)
+        rows[n] = rows[source]
+        gens[n] = gen
+        return n
+
+    def _read(self, top, i):
+        return int(self.pages[self.dirs[top[i >> DIR_SHIFT], (i >> PAGE_BITS) & DIR_MASK], i & PAGE_MASK])
+
+    def _dense(self, top, size):
+        if not top:
+            return np.zeros(0, dtype=np.int64)
+        return self.pages[self.dirs[top].ravel()].ravel()[:size]
+
+    def get(self, holder, default=0):
+        i = self.index.get(holder)
+        return default if i is None else self._read(self.top, i)
+
+    def add(self, holder, delta):
+        i = self.index.get(holder)
+        if i is None:
+            i = self.index[holder] = len(self.names)
+            self.names.append(holder)
+            if i >> DIR_SHIFT == len(self.top):     # new directory, every entry the zero page
+                self.top.append(self._new_row("dirs", self.generation, self.n_dirs, 0))
+                self.dirs[self.top[-1]] = 0
+                self.n_dirs += 1
+        t = i >> DIR_SHIFT
+        d = self.top[t]
+        if self.dir_gen[d] != self.generation:      # directory shared with a snapshot
+            d = self.top[t] = self._new_row("dirs", self.generation, self.n_dirs, d)
+            self.n_dirs += 1
+        m = (i >> PAGE_BITS) & DIR_MASK
+        p = self.dirs[d, m]
+        if self.page_gen[p] != self.generation:     # copy-on-write of one page
+            p = self.dirs[d, m] = self._new_row("pages", self.generation, self.n_pages, p)
+            self.n_pages += 1
+            self.pages_copied += 1
+        self.pages[p, i & PAGE_MASK] += delta
+
+    def items(self):
+        return RegistrySnapshot(self, None).items()
+
+    def snapshot(self, label):
+        snap = self.snapshots[label] = RegistrySnapshot(self, label)
+        self.generation += 1
+        return snap
+
+    def memory_bytes(self):
+        # rows in use (pages, directories, their generations) plus snapshot top lists
+        return (self.n_pages * (self.pages.shape[1] + 1) * 8 + self.n_dirs * (self.dirs.shape[1] * 4 + 8)
+                + 8 * sum(len(snap.top) for snap in self.snapshots.values()))
+
 class BondToken:
-    def __init__(self, issuer, face_value, coupon_rate, maturity_days):
+    def __init__(self, issuer, face_value, coupon_rate, maturity_days, frequency=1, day_count="30/360"):
         self.issuer = issuer
         self.face_value = face_value
         self.coupon_rate = coupon_rate  # annual rate, e.g., 0.05
-        self.maturity = datetime.utcnow() + timedelta(days=maturity_days)
-        self.holders = {}  # holder -> amount (number of bond tokens)
+        self.issue_date = datetime.utcnow()
+        self.maturity = self.issue_date + timedelta(days=maturity_days)
+        self.frequency = frequency      # coupons per year (used by BondPortfolio)
+        self.day_count = day_count
+        self.registry = HolderRegistry()  # holder -> amount (number of bond tokens)
         self.issued = False
 
+    @property
+    def holders(self):
+        return dict(self.registry.items())
+
     def issue(self, to, quantity):
         # Mint bond tokens to buyer
-        self.holders[to] = self.holders.get(to, 0) + quantity
+        self.registry.add(to, quantity)
         self.issued = True
         print(f"Issued {quantity} bond(s) (face {self.face_value}) to {to}")
 
-    def pay_coupon(self, now=None):
+    def record(self, record_date):
+        # Freeze the holder list at a coupon record date (copy-on-write snapshot)
+        return self.registry.snapshot(record_date)
+
+    def pay_coupon(self, now=None, record_date=None):
         now = now or datetime.utcnow()
         if now >= self.maturity:
             print("Bond matured — pay principal on redeem")
             return
-        # For demo assume coupon paid yearly and proportional to quantity
-        for holder, qty in self.holders.items():
+        # For demo assume coupon paid yearly and proportional to quantity;
+        # with a record date, whoever held the bonds on that date is paid
+        holders = self.registry if record_date is None else self.registry.snapshots[record_date]
+        for holder, qty in holders.items():
             payment = qty * self.face_value * self.coupon_rate
             print(f"Coupon paid to {holder}: {payment:.2f} (qty {qty})")
 
     def transfer(self, frm, to, qty):
-        if self.holders.get(frm, 0) < qty:
+        if self.registry.get(frm, 0) < qty:
             raise ValueError("insufficient bond tokens")
-        self.holders[frm] -= qty
-        self.holders[to] = self.holders.get(to, 0) + qty
+        self.registry.add(frm, -qty)
+        self.registry.add(to, qty)
         print(f"Transferred {qty} bond token(s) from {frm} to {to}")
 
     def redeem(self, holder, now=None):
         now = now or datetime.utcnow()
         if now < self.maturity:
             raise ValueError("cannot redeem before maturity")
-        qty = self.holders.get(holder, 0)
+        qty = self.registry.get(holder, 0)
         if qty == 0:
             print("No bonds to redeem")
             return
         # Pay principal
         principal = qty * self.face_value
         print(f"Redeemed {qty} bond(s) from {holder}. Principal paid: {principal:.2f}")
-        self.holders[holder] = 0
+        self.registry.add(holder, -qty)
+
+# -------------------
+# Portfolio cash-flow engine (vectorised)
+# -------------------
+DAY_COUNTS = {"ACT/360": 0, "ACT/365F": 1, "30/360": 2, "ACT/ACT": 3}
+
+def _days(d):
+    return d.astype("datetime64[D]").astype(np.int64)
+
+def add_months(dates, months):
+    # datetime64[D] + whole months, clipped to month end (Aug 31 - 6M = Feb 28/29)
+    month = dates.astype("datetime64[M]")
+    day = dates - month.astype("datetime64[D]")
+    target = month + months.astype("timedelta64[M]")
+    last = (target + np.timedelta64(1, "M")).astype("datetime64[D]") - np.timedelta64(1, "D")
+    return np.minimum(target.astype("datetime64[D]") + day, last)
+
+def _thirty_360(start, end):
+    # 30/360 US bond basis: day 31 counts as 30 (on the end date only if the start was 30/31)
+    def ymd(d):
+        month = d.astype("datetime64[M]")
+        return (d.astype("datetime64[Y]").astype(np.int64), month.astype(np.int64) % 12,
+                (d - month.astype("datetime64[D]")).astype(np.int64) + 1)
+    y1, m1, d1 = ymd(start)
+    y2, m2, d2 = ymd(end)
+    d1 = np.minimum(d1, 30)
+    d2 = np.where((d1 == 30) & (d2 == 31), 30, d2)
+    return (360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)) / 360.0
+
+def year_fraction(start, end, convention, period_start=None, frequency=None):
+    # Accrual fraction per element; convention is an array of DAY_COUNTS codes.
+    # ACT/ACT is the ICMA rule: actual days / (frequency * days of the regular period).
+    out = np.empty(len(start))
+    actual = (_days(end) - _days(start)).astype(float)
+    for code in np.unique(convention):
+        m = convention == code
+        if code == DAY_COUNTS["ACT/360"]:
+            out[m] = actual[m] / 360.0
+        elif code == DAY_COUNTS["ACT/365F"]:
+            out[m] = actual[m] / 365.0
+        elif code == DAY_COUNTS["30/360"]:
+            out[m] = _thirty_360(start[m], end[m])
+        else:
+            regular = (_days(end[m]) - _days(period_start[m])).astype(float)
+            out[m] = actual[m] / (frequency[m] * regular)
+    return out
+
+FREQUENCIES = (1, 2, 3, 4, 6, 12)    # coupons per year that divide 12 months evenly
+
+def coupon_schedule(issue, maturity, frequency):
+    # All coupon dates of all series, rolled backwards from maturity every
+    # 12/frequency months; the first period may be a short stub from the issue date.
+    # Returns (series index, payment date, accrual start, regular period start).
+    frequency = np.asarray(frequency)
+    if not np.isin(frequency, FREQUENCIES).all():
+        raise ValueError(f"coupon frequency must be one of {FREQUENCIES} per year")
+    step = 12 // frequency
+    months = (maturity.astype("datetime64[M]") - issue.astype("datetime64[M]")).astype(np.int64)
+    n = months // step + 1                              # candidate dates per series
+    series = np.repeat(np.arange(len(issue)), n)
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)       # 0, 1, ... within a series
+    pay = add_months(maturity[series], -k * step[series])
+    keep = pay > issue[series]
+    series, k, pay = series[keep], k[keep], pay[keep]
+    period_start = add_months(maturity[series], -(k + 1) * step[series])
+    return series, pay, np.maximum(period_start, issue[series]), period_start
+
+CashFlows = namedtuple("CashFlows", "dates series coupon_per_unit coupon_total "
+                                    "redemption_total holder_coupon holder_principal")
+
+class BondPortfolio:
+    # Column store: one array entry per bond series and per holder position.
+    # Schedules are generated once; cashflows(start, end) is a handful of NumPy
+    # passes (masks and bincounts) whatever the number of holders.
+    def __init__(self, face, rate, issue, maturity, frequency, day_count):
+        self.face = np.asarray(face, dtype=float)
+        self.rate = np.asarray(rate, dtype=float)
+        self.issue = np.asarray(issue, dtype="datetime64[D]")
+        self.maturity = np.asarray(maturity, dtype="datetime64[D]")
+        self.frequency = np.asarray(frequency, dtype=np.int64)
+        self.day_count = np.array([DAY_COUNTS[d] for d in day_count] if len(day_count)
+                                  and isinstance(day_count[0], str) else day_count, dtype=np.int64)
+        self.n_series = len(self.face)
+        # flattened coupon schedule, coupon amount per unit (one bond token)
+        self.ev_series, self.ev_date, start, period_start = coupon_schedule(
+            self.issue, self.maturity, self.frequency)
+        s = self.ev_series
+        self.ev_coupon = self.face[s] * self.rate[s] * year_fraction(
+            start, self.ev_date, self.day_count[s], period_start, self.frequency[s])
+        self.pos_series = np.zeros(0, dtype=np.int64)
+        self.pos_holder = np.zeros(0, dtype=np.int64)
+        self.pos_qty = np.zeros(0, dtype=np.int64)
+        self.n_holders = 0
+
+    @classmethod
+    def from_tokens(cls, bonds, holder_ids=None):
+        # one series per BondToken, positions from its holders dict
+        pf = cls([b.face_value for b in bonds], [b.coupon_rate for b in bonds],
+                 [np.datetime64(b.issue_date, "D") for b in bonds],
+                 [np.datetime64(b.maturity, "D") for b in bonds],
+                 [b.frequency for b in bonds], [b.day_count for b in bonds])
+        holder_ids = {} if holder_ids is None else holder_ids
+        rows = [(i, holder_ids.setdefault(h, len(holder_ids)), q)
+                for i, b in enumerate(bonds) for h, q in b.holders.items() if q]
+        if rows:
+            pf.add_positions(*map(np.array, zip(*rows)))
+        return pf, holder_ids
+
+    def add_positions(self, series, holder, qty):
+        self.pos_series = np.concatenate([self.pos_series, np.asarray(series, dtype=np.int64)])
+        self.pos_holder = np.concatenate([self.pos_holder, np.asarray(holder, dtype=np.int64)])
+        self.pos_qty = np.concatenate([self.pos_qty, np.asarray(qty, dtype=np.int64)])
+        self.n_holders = max(self.n_holders, int(self.pos_holder.max()) + 1 if len(self.pos_holder) else 0)
+
+    def outstanding(self):
+        return np.bincount(self.pos_series, weights=self.pos_qty, minlength=self.n_series)
+
+    def cashflows(self, start, end):
+        # every coupon and redemption paid in [start, end], per event and per holder
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+        ev = (self.ev_date >= start) & (self.ev_date <= end)
+        order = np.argsort(self.ev_date[ev], kind="stable")
+        ev_series = self.ev_series[ev][order]
+        ev_coupon = self.ev_coupon[ev][order]
+        coupon_unit = np.bincount(ev_series, weights=ev_coupon, minlength=self.n_series)
+        principal_unit = np.where((self.maturity >= start) & (self.maturity <= end), self.face, 0.0)
+        outstanding = self.outstanding()
+        qty = self.pos_qty.astype(float)
+        return CashFlows(
+            dates=self.ev_date[ev][order], series=ev_series, coupon_per_unit=ev_coupon,
+            coupon_total=ev_coupon * outstanding[ev_series],
+            redemption_total=principal_unit * outstanding,
+            holder_coupon=np.bincount(self.pos_holder, weights=qty * coupon_unit[self.pos_series],
+                                      minlength=self.n_holders),
+            holder_principal=np.bincount(self.pos_holder, weights=qty * principal_unit[self.pos_series],
+                                         minlength=self.n_holders))
+
+def cashflows_loop(pf, holders, start, end):
+    # Reference in the style of BondToken.pay_coupon: for every coupon event,
+    # visit every holder of that series. holders[series] = {holder: qty}.
+    start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+    coupon, principal = defaultdict(float), defaultdict(float)
+    for series, date, unit in zip(pf.ev_series.tolist(), pf.ev_date.tolist(), pf.ev_coupon.tolist()):
+        if start <= np.datetime64(date, "D") <= end:
+            for holder, qty in holders[series].items():
+                coupon[holder] += qty * unit
+    for series, maturity in enumerate(pf.maturity.tolist()):
+        if start <= np.datetime64(maturity, "D") <= end:
+            for holder, qty in holders[series].items():
+                principal[holder] += qty * pf.face[series]
+    return coupon, principal
+
+def random_portfolio(n_series, n_positions, n_holders, seed=0):
+    rng = np.random.default_rng(seed)
+    issue = np.datetime64("2020-01-01") + rng.integers(0, 5 * 365, n_series).astype("timedelta64[D]")
+    maturity = add_months(issue, rng.choice([24, 36, 60, 120, 360], n_series))
+    pf = BondPortfolio(face=rng.choice([100.0, 1000.0], n_series), rate=rng.uniform(0.0, 0.08, n_series),
+                       issue=issue, maturity=maturity, frequency=rng.choice([1, 2, 4, 12], n_series),
+                       day_count=rng.integers(0, len(DAY_COUNTS), n_series))
+    pf.add_positions(rng.integers(0, n_series, n_positions), rng.integers(0, n_holders, n_positions),
+                     rng.integers(1, 100, n_positions))
+    return pf
+
+def benchmark_portfolio(n_series=5000, n_positions=2000000, n_holders=500000, loop_positions=200000):
+    start = time.perf_counter()
+    pf = random_portfolio(n_series, n_positions, n_holders)
+    t_build = time.perf_counter() - start
+    print(f" {n_series:,} series, {n_positions:,} positions, {n_holders:,} holders, "
+          f"{len(pf.ev_date):,} coupon dates (schedules built in {t_build:.2f}s)")
+    window = ("2025-01-01", "2025-12-31")
+    start = time.perf_counter()
+    cf = pf.cashflows(*window)
+    t_vec = time.perf_counter() - start
+    print(f" vectorised sweep {window[0]}..{window[1]}: {len(cf.dates):,} coupon events, "
+          f"coupons {cf.holder_coupon.sum():,.0f}, principal {cf.holder_principal.sum():,.0f} "
+          f"in {t_vec:.3f}s ({n_positions / t_vec:,.0f} positions/s)")
+
+    # per-holder loop on the first loop_positions positions, checked against the sweep
+    sub = random_portfolio(n_series, n_positions, n_holders)
+    for name in ("pos_series", "pos_holder", "pos_qty"):
+        setattr(sub, name, getattr(sub, name)[:loop_positions])
+    holders = [defaultdict(int) for _ in range(n_series)]
+    for s, h, q in zip(sub.pos_series.tolist(), sub.pos_holder.tolist(), sub.pos_qty.tolist()):
+        holders[s][h] += q
+    start = time.perf_counter()
+    coupon, principal = cashflows_loop(sub, holders, *window)
+    t_loop = time.perf_counter() - start
+    ref = sub.cashflows(*window)
+    assert all(abs(ref.holder_coupon[h] - c) < 1e-6 * max(1.0, c) for h, c in coupon.items())
+    assert all(abs(ref.holder_principal[h] - p) < 1e-6 * max(1.0, p) for h, p in principal.items())
+    rate = loop_positions / t_loop
+    print(f" per-holder loop on {loop_positions:,} positions: {t_loop:.2f}s ({rate:,.0f} positions/s), "
+          f"~{n_positions / rate:.1f}s for all; speed-up x{n_positions / rate / t_vec:,.0f}")
+
+def benchmark_registry(n_holders=1000000, record_dates=50, transfers=(1000, 10000), seed=0):
+    # Random transfers between record dates and a snapshot at every record date:
+    # memory added per record date versus one full copy, and lookups in old snapshots
+    names = [f"H{i}" for i in range(n_holders)]
+    print(f" {n_holders:,} holders, {record_dates} record dates; "
+          f"a full copy per record date takes {n_holders * 8 / 2**20:.1f} MiB")
+    for per_date in transfers:
+        rng = np.random.default_rng(seed)
+        reg = HolderRegistry()
+        for name in names:
+            reg.add(name, 100)
+        base = reg.memory_bytes()
+        start = time.perf_counter()
+        for day in range(record_dates):
+            reg.snapshot(day)
+            for a, b, q in zip(rng.integers(0, n_holders, per_date).tolist(),
+                               rng.integers(0, n_holders, per_date).tolist(),
+                               rng.integers(1, 10, per_date).tolist()):
+                if reg.get(names[a]) >= q:
+                    reg.add(names[a], -q)
+                    reg.add(names[b], q)
+        t_run = time.perf_counter() - start
+        probes = [names[i] for i in rng.integers(0, n_holders, 100000)]
+        snaps = [reg.snapshots[d] for d in rng.integers(0, record_dates, 100000)]
+        start = time.perf_counter()
+        total = sum(snap.get(h) for snap, h in zip(snaps, probes))
+        t_get = time.perf_counter() - start
+        added = (reg.memory_bytes() - base) / record_dates
+        print(f" {per_date:>7,} transfers/date: {record_dates * per_date / t_run:>9,.0f} transfers/s, "
+              f"+{added / 2**20:.2f} MiB per record date ({added / (2 * per_date):.0f} B per changed "
+              f"position), {100000 / t_get:,.0f} snapshot lookups/s")
+        assert reg.snapshots[0].balances().sum() == reg.snapshots[record_dates - 1].balances().sum() \
+            == 100 * n_holders and total > 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", action="store_true", help="benchmark the portfolio engine and holder registry")
+    args = parser.parse_args()
+
     # Demo: Issuer creates and issues bond tokens
     issuer = "AcmeCorp"
     bond = BondToken(issuer, face_value=1000, coupon_rate=0.05, maturity_days=30)
@@ -63,12 +428,36 @@ if __name__ == "__main__":
     # Simulate coupon payment now
     bond.pay_coupon()
 
+    # Record date, then a transfer before the payment date:
+    # the coupon still goes to the holders on record
+    record_date = datetime.utcnow().date()
+    bond.record(record_date)
+
     # Transfer a bond token
     bond.transfer("InvestorA", "InvestorC", qty=2)
     print("Holders after transfer:", bond.holders)
+    bond.pay_coupon(record_date=record_date)
 
     # Fast-forward to maturity and redeem
     future = bond.maturity + timedelta(seconds=1)
     bond.redeem("InvestorA", now=future)
     bond.redeem("InvestorB", now=future)
     print("Holders after redemption:", bond.holders)
+
+    # Same bond as a one-series portfolio: quarterly ACT/ACT coupons over ten years
+    bond10 = BondToken(issuer, face_value=1000, coupon_rate=0.05, maturity_days=3652,
+                       frequency=4, day_count="ACT/ACT")
+    bond10.issue("InvestorA", 8)
+    bond10.issue("InvestorC", 2)
+    pf, ids = BondPortfolio.from_tokens([bond10])
+    cf = pf.cashflows(bond10.issue_date, bond10.issue_date + timedelta(days=366))
+    print("\nCoupon dates in the first year:", [str(d) for d in cf.dates])
+    print("Coupon per bond:", np.round(cf.coupon_per_unit, 2))
+    for name, i in ids.items():
+        print(f"{name}: coupons {cf.holder_coupon[i]:.2f}")
+
+    if args.bench:
+        print("\nPortfolio cash-flow benchmark")
+        benchmark_portfolio()
+        print("\nHolder registry benchmark")
+        benchmark_registry()
@@ -0,0 +1,340 @@
+# Consensus benchmarking harness: PoW, PoA, PBFT and PoS on the same workload
+# - one stream of transactions (Poisson arrivals, fixed-size payloads) cut into
+#   blocks of tx_per_block; a block is sealed once its last transaction arrived
+# - same validator count, fault ratio and network latency for every mechanism
+# - every validator re-hashes each block's transactions (the shared validation
+#   cost), so CPU time covers the whole simulated network, not a single node
+# - reports finalized throughput, finality latency (transaction arrival ->
+#   final), CPU-seconds per block and message overhead; --out appends the rows
+#   to a CSV
+#
+# Finality per mechanism:
+#   PoW   block buried under z blocks, z from Nakamoto's attacker-success formula
+#         (P < 0.1%) for an attacker with fault_ratio of the hash power
+#   PoA   Aura rule: floor(n/2)+1 distinct validators have sealed a block at or
+#         after it; crashed authorities miss their step (round_timeout)
+#   PBFT  client accepts on f+1 replies (message-level simulation, pbft_simulation.py)
+#   PoS   two-chain rule: a block is final when its child gathers attestations
+#         from > 2/3 of the stake; crashed proposers leave their slot empty
+#
+# Simulated time = measured CPU of the producing node + sampled link latency,
+# so PoW block times come from real mining at the chosen difficulty.
+#
+# Run: python3 consensus_bench.py [--validators 4 16 64] [--faults 0 0.2] [--blocks 40] [--out FILE]
+
+import argparse
+import csv
+import hashlib
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, asdict
+
+from consensus_examples import ProofOfWork, ProofOfAuthority, ProofOfStake
+from pbft_simulation import PBFTConfig, run_pbft_simulation, HEADER_BYTES, SIGNATURE_BYTES
+
+MECHANISMS = ["PoW", "PoA", "PBFT", "PoS"]
+ATTESTATION_BYTES = HEADER_BYTES + SIGNATURE_BYTES
+EPOCH_SLOTS = 32
+
+@dataclass
+class Workload:
+    blocks: int = 40
+    tx_per_block: int = 100
+    tx_bytes: int = 250
+    tx_rate: float = 5000.0           # offered load, transactions per second
+    validators: int = 16
+    fault_ratio: float = 0.0          # share of faulty validators (PoW: hash power)
+    latency: float = 0.005            # one-way link latency (seconds)
+    jitter: float = 0.002
+    difficulty: int = 4               # PoW: leading hex zeros
+    round_timeout: float = 0.02       # PoA/PoS: time lost to a missed slot
+    seed: int = 0
+
+@dataclass
+class BenchRow:
+    mechanism: str
+    validators: int
+    faulty: int
+    fault_ratio: float
+    blocks: int
+    tx_per_block: int
+    tx_rate: float
+    finalized_tx: int
+    throughput_tps: float
+    finality_mean_ms: float
+    finality_p99_ms: float
+    cpu_s_per_block: float
+    msgs_per_block: float
+    kb_per_block: float
+    wall_s: float
+
+class Stream:
+    # the shared workload: transaction payloads, arrival times, block ready times
+    def __init__(self, wl):
+        rng = random.Random(wl.seed)
+        self.blocks = [[rng.randbytes(wl.tx_bytes) for _ in range(wl.tx_per_block)]
+                       for _ in range(wl.blocks)]
+        self.arrivals = []
+        t = 0.0
+        for _ in range(wl.blocks * wl.tx_per_block):
+            t += rng.expovariate(wl.tx_rate)
+            self.arrivals.append(t)
+        self.ready = [self.arrivals[(i + 1) * wl.tx_per_block - 1] for i in range(wl.blocks)]
+
+def block_root(txs):
+    # digest over the transaction hashes; recomputed by every validating node
+    return hashlib.sha256(b"".join(hashlib.sha256(tx).digest() for tx in txs)).hexdigest()
+
+def check_root(txs, root):
+    # explicit check (not assert) so the validation work survives python -O
+    if block_root(txs) != root:
+        raise ValueError("block payload does not match its root")
+
+def faulty_count(wl):
+    return min(wl.validators, max(0, round(wl.fault_ratio * wl.validators)))
+
+def block_bytes(wl):
+    return HEADER_BYTES + SIGNATURE_BYTES + wl.tx_per_block * wl.tx_bytes
+
+def attacker_success(q, z):
+    # Nakamoto (2008), section 11: probability an attacker with hash share q
+    # ever catches up from z blocks behind
+    p = 1.0 - q
+    lam = z * q / p
+    s = 1.0
+    for k in range(z + 1):
+        s -= math.exp(-lam) * lam ** k / math.factorial(k) * (1 - (q / p) ** (z - k))
+    return s
+
+def confirmations(q, eps=1e-3, max_z=500):
+    for z in range(1, max_z):
+        if attacker_success(q, z) < eps:
+            return z
+    return None
+
+def _row(name, wl, stream, faulty, final, cpu, msgs, nbytes, wall):
+    # final[i]: time block i became final (None if never)
+    T = wl.tx_per_block
+    lat = sorted(final[i] - a for i in range(wl.blocks) if final[i] is not None
+                 for a in stream.arrivals[i * T:(i + 1) * T])
+    if lat:
+        span = max(f for f in final if f is not None) - stream.arrivals[0]
+        tps, mean, p99 = len(lat) / span, sum(lat) / len(lat), lat[min(len(lat) - 1, int(0.99 * len(lat)))]
+    else:
+        tps, mean, p99 = 0.0, float("nan"), float("nan")
+    return BenchRow(name, wl.validators, faulty, wl.fault_ratio, wl.blocks, T, wl.tx_rate,
+                    len(lat), tps, 1000 * mean, 1000 * p99, cpu / wl.blocks,
+                    msgs / wl.blocks, nbytes / wl.blocks / 1024, wall)
+
+# ------------------------------------------
+# One runner per mechanism
+# ------------------------------------------
+def bench_pow(wl, stream):
+    wall = time.perf_counter()
+    rng = random.Random(wl.seed)
+    n = wl.validators
+    faulty = faulty_count(wl)
+    q = faulty / n
+    z = confirmations(q) if q < 0.5 else None
+    pow_ = ProofOfWork(wl.difficulty)
+    produced, prev, t = [], "0" * 64, 0.0
+    cpu = msgs = nbytes = 0
+    if faulty == n:                     # no honest hash power at all
+        return _row("PoW", wl, stream, faulty, [None] * wl.blocks, cpu, msgs, nbytes,
+                    time.perf_counter() - wall)
+    # mine z extra (empty) blocks so the last real block can be buried too
+    for i in range(wl.blocks + (z or 0)):
+        real = i < wl.blocks
+        txs = stream.blocks[i] if real else []
+        start = max(t, stream.ready[i]) if real else t
+        c = time.process_time()
+        root = block_root(txs)
+        nonce, h = pow_.mine(prev + root, max_tries=10 ** 9)
+        mining = time.process_time() - c
+        if real:
+            for _ in range(n - 1):      # peers check the payload and the proof of work
+                check_root(txs, root)
+                if hashlib.sha256(f"{prev}{root}{nonce}".encode()).hexdigest() != h:
+                    raise ValueError("invalid proof of work")
+            cpu += time.process_time() - c
+            msgs += n - 1
+            nbytes += (n - 1) * block_bytes(wl)
+        # the local miner stands in for the honest network, which only has (1 - q)
+        # of the hash power: honest blocks arrive 1 / (1 - q) times slower
+        t = start + mining / (1 - q) + wl.latency + rng.random() * wl.jitter
+        produced.append(t)
+        prev = h
+    final = [produced[i + z] if z else None for i in range(wl.blocks)]
+    return _row("PoW", wl, stream, faulty, final, cpu, msgs, nbytes, time.perf_counter() - wall)
+
+def bench_poa(wl, stream):
+    wall = time.perf_counter()
+    rng = random.Random(wl.seed)
+    n = wl.validators
+    faulty = faulty_count(wl)
+    validators = [f"V{i}" for i in range(n)]
+    poa = ProofOfAuthority(validators)
+    crashed = set(rng.sample(validators, faulty))
+    need = n // 2 + 1
+    final = [None] * wl.blocks
+    pending = []                        # [block index, distinct sealers since it]
+    t, r, i = 0.0, 0, 0
+    cpu = msgs = nbytes = 0
+    if faulty * 2 >= n:                 # no majority of live authorities: nothing finalizes
+        return _row("PoA", wl, stream, faulty, final, cpu, msgs, nbytes, time.perf_counter() - wall)
+    while i < wl.blocks or pending:
+        rnd, r = r, r + 1
+        proposer = poa.proposer_for_round(rnd)
+        if proposer in crashed:
+            t += wl.round_timeout
+            continue
+        real = i < wl.blocks
+        txs = stream.blocks[i] if real else []
+        start = max(t, stream.ready[i]) if real else t
+        c = time.process_time()
+        block = poa.create_block(rnd, block_root(txs))
+        build = time.process_time() - c
+        if real:
+            for _ in range(n - 1):      # peers check the payload and the proposer's signature
+                check_root(txs, block["payload"])
+                if not poa.verify_block(block):
+                    raise ValueError("invalid block signature")
+            cpu += time.process_time() - c
+            msgs += n - 1
+            nbytes += (n - 1) * block_bytes(wl)
+            pending.append([i, set()])
+            i += 1
+        t = start + build + wl.latency + rng.random() * wl.jitter
+        still = []
+        for entry in pending:
+            entry[1].add(proposer)
+            if len(entry[1]) >= need:
+                final[entry[0]] = t
+            else:
+                still.append(entry)
+        pending = still
+    return _row("PoA", wl, stream, faulty, final, cpu, msgs, nbytes, time.perf_counter() - wall)
+
+def bench_pbft(wl, stream):
+    wall = time.perf_counter()
+    n = wl.validators
+    faulty = faulty_count(wl)
+    f = (n - 1) // 3
+    final = [None] * wl.blocks
+    if faulty > f:                      # beyond f faults PBFT guarantees nothing
+        return _row("PBFT", wl, stream, faulty, final, 0, 0, 0, time.perf_counter() - wall)
+    cfg = PBFTConfig(n=n, byzantine=faulty // 2, crashed=faulty - faulty // 2,
+                     requests=len(stream.arrivals), batch_size=wl.tx_per_block,
+                     batch_timeout=stream.arrivals[-1] + 1.0,     # seal full blocks only
+                     latency=wl.latency, jitter=wl.jitter, seed=wl.seed,
+                     request_bytes=wl.tx_bytes, arrivals=stream.arrivals)
+    res = run_pbft_simulation(cfg)
+    # CPU covers only the validation path, as for the other mechanisms: the primary
+    # digests each batch and the backups check it on pre-prepare. The simulator's
+    # own event-queue work is not consensus CPU.
+    c = time.process_time()
+    for txs in stream.blocks:
+        root = block_root(txs)
+        for _ in range(n - 1):
+            check_root(txs, root)
+    cpu = time.process_time() - c
+    T = wl.tx_per_block
+    tps = res.committed_requests / (res.sim_seconds - stream.arrivals[0])
+    return BenchRow("PBFT", n, faulty, wl.fault_ratio, wl.blocks, T, wl.tx_rate,
+                    res.committed_requests, tps, 1000 * res.latency_mean, 1000 * res.latency_p99,
+                    cpu / wl.blocks, res.total_messages / wl.blocks,
+                    res.bytes / wl.blocks / 1024, time.perf_counter() - wall)
+
+def bench_pos(wl, stream):
+    wall = time.perf_counter()
+    rng = random.Random(wl.seed)
+    n = wl.validators
+    faulty = faulty_count(wl)
+    stakes = {f"V{i}": rng.randint(1, 100) for i in range(n)}
+    pos = ProofOfStake(stakes, seed=wl.seed)
+    crashed = set(rng.sample(list(stakes), faulty))
+    honest = n - faulty
+    supermajority = 3 * sum(s for v, s in stakes.items() if v not in crashed) > 2 * sum(stakes.values())
+    final = [None] * wl.blocks
+    justified = []
+    t, i = 0.0, 0
+    cpu = msgs = nbytes = 0
+    if honest == 0:                     # every proposer is down: no slot is ever filled
+        return _row("PoS", wl, stream, faulty, final, cpu, msgs, nbytes, time.perf_counter() - wall)
+    slots = []
+    # one extra (empty) block justifies the last real one
+    while i < wl.blocks + (1 if supermajority else 0):
+        if not slots:
+            slots = pos.choose_proposers(EPOCH_SLOTS)[::-1]
+        if slots.pop() in crashed:
+            t += wl.round_timeout
+            continue
+        real = i < wl.blocks
+        txs = stream.blocks[i] if real else []
+        start = max(t, stream.ready[i]) if real else t
+        c = time.process_time()
+        root = block_root(txs)
+        build = time.process_time() - c
+        if real:
+            for _ in range(n - 1):
+                check_root(txs, root)
+            cpu += time.process_time() - c
+            # block gossip plus one attestation per live validator
+            msgs += n - 1 + honest
+            nbytes += (n - 1) * block_bytes(wl) + honest * ATTESTATION_BYTES
+        t = start + build + wl.latency + rng.random() * wl.jitter
+        if supermajority:
+            # attestations travel back before the block counts as justified
+            justified.append(t + wl.latency + rng.random() * wl.jitter)
+            if i > 0:
+                final[i - 1] = justified[i]
+        i += 1
+    return _row("PoS", wl, stream, faulty, final, cpu, msgs, nbytes, time.perf_counter() - wall)
+
+RUNNERS = {"PoW": bench_pow, "PoA": bench_poa, "PBFT": bench_pbft, "PoS": bench_pos}
+
+def run(wl, mechanisms=MECHANISMS):
+    stream = Stream(wl)
+    return [RUNNERS[m](wl, stream) for m in mechanisms]
+
+def write_csv(rows, path):
+    new = not os.path.exists(path)
+    with open(path, "a", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(asdict(rows[0])))
+        if new:
+            writer.writeheader()
+        writer.writerows(asdict(r) for r in rows)
+
+def print_row(r):
+    print(f"{r.mechanism:>5} {r.validators:>4} {r.faulty:>4} {r.throughput_tps:>9,.0f} "
+          f"{r.finality_mean_ms:>9.1f} {r.finality_p99_ms:>9.1f} {1000 * r.cpu_s_per_block:>10.2f} "
+          f"{r.msgs_per_block:>10,.0f} {r.kb_per_block:>9,.0f} {r.wall_s:>7.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--validators", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--faults", type=float, nargs="+", default=[0.0, 0.2])
+    parser.add_argument("--mechanisms", nargs="+", default=MECHANISMS, choices=MECHANISMS)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--tx-per-block", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=5000.0, help="offered load (tx/s)")
+    parser.add_argument("--difficulty", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="append the rows to this CSV file")
+    args = parser.parse_args()
+
+    print(f"{'mech':>5} {'n':>4} {'bad':>4} {'tx/s':>9} {'final ms':>9} {'p99 ms':>9} "
+          f"{'cpu ms/blk':>10} {'msgs/blk':>10} {'KB/blk':>9} {'wall s':>7}")
+    rows = []
+    for n in args.validators:
+        for ratio in args.faults:
+            wl = Workload(blocks=args.blocks, tx_per_block=args.tx_per_block, tx_rate=args.rate,
+                          validators=n, fault_ratio=ratio, difficulty=args.difficulty, seed=args.seed)
+            for r in run(wl, args.mechanisms):
+                print_row(r)
+                rows.append(r)
+    if args.out:
+        write_csv(rows, args.out)
+        print(f"\n{len(rows)} rows appended to {args.out}")
@@ -1,15 +1,25 @@
 # Minimal consensus mechanism examples for presentation/demo
 # - ProofOfWork: simple mining by finding a nonce meeting a difficulty prefix
-# - ProofOfAuthority: rotating set of authorized validators (no heavy crypto)
-# - PBFT: tiny simulation of pre-prepare / prepare / commit phases
+#   (also: numeric 256-bit targets in Bitcoin's compact 'bits' form and a
+#   difficulty retargeting simulation)
+# - ProofOfAuthority: rotating set of authorized validators with signed blocks
+#   (dynamic validator sets and batched import: poa_engine.py)
+# - PBFT: message-level simulation of pre-prepare / prepare / commit phases
 # - ProofOfStake: proposer chosen by stake-weighted random selection
+#   (alias table for whole epochs, Fenwick tree for stake updates)
 #
 # Run: python3 consensus_examples.py
 
 import hashlib
 import time
 import random
-from collections import defaultdict, Counter
+import os
+import math
+import multiprocessing as mp
+from collections import Counter
+
+from pbft_simulation import PBFTConfig, run_pbft_simulation
+from poa_engine import keygen, sign, verify
 
 # -------------------
 # Proof of Work (PoW)
@@ -19,6 +29,20 @@ class ProofOfWork:
         self.difficulty = difficulty  # number of leading hex zeros required
 
     def mine(self, data, max_tries=1000000):
+        # Midstate caching: SHA-256 state over the constant data is computed once,
+        # each attempt only copies it and absorbs the nonce digits
+        prefix = '0' * self.difficulty
+        midstate = hashlib.sha256(f"{data}".encode())
+        for nonce in range(max_tries):
+            hasher = midstate.copy()
+            hasher.update(str(nonce).encode())
+            h = hasher.hexdigest()
+            if h.startswith(prefix):
+                return nonce, h
+        return None, None
+
+    def mine_naive(self, data, max_tries=1000000):
+        # Re-hashes data + nonce from scratch on every attempt (for comparison)
         prefix = '0' * self.difficulty
         for nonce in range(max_tries):
             h = hashlib.sha256(f"{data}{nonce}".encode()).hexdigest()
@@ -26,13 +50,152 @@ class ProofOfWork:
                 return nonce, h
         return None, None
 
+    def mine_parallel(self, data, workers=None, chunk_size=50000, max_tries=100000000):
+        # Multi-core nonce search. The nonce space is cut into chunks of chunk_size;
+        # worker w scans chunks w, w+W, w+2W, ... (strided, so all workers stay near
+        # the low nonces). The first worker to find a valid hash sets a shared stop
+        # event and every other worker exits at its next check.
+        workers = workers or os.cpu_count() or 1
+        prefix = '0' * self.difficulty
+        stop = mp.Event()
+        results = mp.Queue()
+        procs = [mp.Process(target=_pow_worker,
+                            args=(w, workers, data, prefix, chunk_size, max_tries, stop, results))
+                 for w in range(workers)]
+        start = time.time()
+        for p in procs:
+            p.start()
+
+        stats, found = [], None
+        for _ in range(workers):
+            r = results.get()
+            stats.append(r)
+            if r["nonce"] is not None and found is None:
+                found = r
+                stop.set()
+        for p in procs:
+            p.join()
+        elapsed = time.time() - start
+
+        total = sum(r["hashes"] for r in stats)
+        return {
+            "nonce": found["nonce"] if found else None,
+            "hash": found["hash"] if found else None,
+            "winner": found["worker"] if found else None,
+            "hashes": total,
+            "seconds": elapsed,
+            "hash_rate": total / elapsed if elapsed else 0.0,
+            "workers": sorted(stats, key=lambda r: r["worker"]),
+        }
+
+    def mine_target(self, data, bits, max_tries=1000000):
+        # Bitcoin-style check: the raw 32-byte digest, read as a big-endian
+        # integer, must be <= the target encoded in compact `bits`. Comparing
+        # equal-length byte strings is exactly that numeric comparison, so no
+        # attempt is converted to hex or int; only the winning hash is.
+        target = bits_to_target(bits).to_bytes(32, "big")
+        midstate = hashlib.sha256(f"{data}".encode())
+        for nonce in range(max_tries):
+            hasher = midstate.copy()
+            hasher.update(str(nonce).encode())
+            if hasher.digest() <= target:
+                return nonce, hasher.hexdigest()
+        return None, None
+
+# -------------------
+# Numeric targets ("bits") and difficulty retargeting
+# -------------------
+MAX_TARGET_BITS = 0x1d00ffff    # Bitcoin's difficulty-1 target
+
+def bits_to_target(bits):
+    # compact encoding: 1 byte exponent (length in bytes), 3 bytes mantissa
+    exponent, mantissa = bits >> 24, bits & 0x007fffff
+    if exponent <= 3:
+        return mantissa >> (8 * (3 - exponent))
+    return mantissa << (8 * (exponent - 3))
+
+def target_to_bits(target):
+    size = (target.bit_length() + 7) // 8
+    if size <= 3:
+        mantissa = target << (8 * (3 - size))
+    else:
+        mantissa = target >> (8 * (size - 3))
+    if mantissa & 0x00800000:       # keep the sign bit clear
+        mantissa >>= 8
+        size += 1
+    return (size << 24) | mantissa
+
+def difficulty(bits):
+    return bits_to_target(MAX_TARGET_BITS) / bits_to_target(bits)
+
+def simulate_retargeting(hashrate, blocks=144 * 20, interval=144, spacing=600.0,
+                         max_adjust=4.0, seed=0):
+    # hashrate: function(time in seconds) -> hashes per second of the whole network.
+    # Block times are exponential with mean (expected hashes per block) / hashrate.
+    # Every `interval` blocks the target is scaled by actual/expected timespan,
+    # clamped to [1/max_adjust, max_adjust] and re-encoded as compact bits
+    # (losing precision exactly like Bitcoin's nBits).
+    rng = random.Random(seed)
+    bits = target_to_bits(int(2 ** 256 / (hashrate(0.0) * spacing)))
+    now, period_start = 0.0, 0.0
+    periods = []
+    for height in range(1, blocks + 1):
+        expected_hashes = 2 ** 256 / (bits_to_target(bits) + 1)
+        now += rng.expovariate(hashrate(now) / expected_hashes)
+        if height % interval == 0:
+            actual = now - period_start
+            ratio = min(max(actual / (interval * spacing), 1 / max_adjust), max_adjust)
+            periods.append({
+                "height": height,
+                "bits": bits,
+                "difficulty": difficulty(bits),
+                "mean_block_time": actual / interval,
+                "hashrate": hashrate(now),
+            })
+            bits = target_to_bits(min(int(bits_to_target(bits) * ratio),
+                                      bits_to_target(MAX_TARGET_BITS)))
+            period_start = now
+    return periods
+
+def _pow_worker(worker, workers, data, prefix, chunk_size, max_tries, stop, results):
+    # One process of ProofOfWork.mine_parallel (module level so it can be pickled)
+    midstate = hashlib.sha256(f"{data}".encode())
+    hashes, start, found = 0, time.time(), None
+    for chunk_start in range(worker * chunk_size, max_tries, workers * chunk_size):
+        if stop.is_set():
+            break
+        for nonce in range(chunk_start, min(chunk_start + chunk_size, max_tries)):
+            hasher = midstate.copy()
+            hasher.update(str(nonce).encode())
+            h = hasher.hexdigest()
+            hashes += 1
+            if h.startswith(prefix):
+                found = (nonce, h)
+                break
+            if hashes & 0xFFF == 0 and stop.is_set():
+                break
+        if found:
+            break
+    elapsed = time.time() - start
+    results.put({
+        "worker": worker,
+        "nonce": found[0] if found else None,
+        "hash": found[1] if found else None,
+        "hashes": hashes,
+        "seconds": elapsed,
+        "hash_rate": hashes / elapsed if elapsed else 0.0,
+    })
+
 # -------------------
 # Proof of Authority (PoA) - simple
 # -------------------
 class ProofOfAuthority:
+    # Static validator set with Schnorr-signed blocks; see poa_engine.PoAChain for
+    # validator votes, epochs and batched verification when syncing
     def __init__(self, validators):
-        # validators: list of validator IDs (strings)
+        # validators: list of validator IDs (strings); each gets a fresh key pair
         self.validators = list(validators)
+        self.keys = {v: keygen() for v in self.validators}
 
     def proposer_for_round(self, round_number):
         # deterministic round-robin proposer selection
@@ -40,74 +203,165 @@ class ProofOfAuthority:
 
     def create_block(self, round_number, payload):
         proposer = self.proposer_for_round(round_number)
+        secret, public = self.keys[proposer]
+        message = f"{round_number}|{proposer}|{payload}".encode()
         block = {
             "proposer": proposer,
             "round": round_number,
             "payload": payload,
-            "signature": f"sig({proposer})"  # placeholder signature
+            "signature": sign(secret, public, message)  # Schnorr (R, s)
         }
         return block
 
+    def verify_block(self, block):
+        message = f"{block['round']}|{block['proposer']}|{block['payload']}".encode()
+        return (block["proposer"] == self.proposer_for_round(block["round"])
+                and verify(self.keys[block["proposer"]][1], message, *block["signature"]))
+
 # -------------------
-# PBFT (simplified educational simulation)
+# PBFT (message-level simulation, see pbft_simulation.py)
 # -------------------
-class PBFTNode:
-    def __init__(self, node_id, nodes):
-        self.id = node_id
-        self.nodes = nodes  # list of node ids
-        self.prepared = set()
-        self.committed = set()
-
-def run_pbft(nodes_count=4):
+def run_pbft(nodes_count=4, requests=1, byzantine=0, crashed=0):
     # PBFT tolerates f faulty nodes where n >= 3f+1
-    nodes = [PBFTNode(i, list(range(nodes_count))) for i in range(nodes_count)]
-    primary = 0
-    request = "transfer $10"
-    print(f"PBFT demo: n={nodes_count}, primary={primary}, request='{request}'")
-
-    # Pre-prepare (primary sends)
-    preprepare = {"view": 0, "seq": 1, "request": request, "primary": primary}
-    print(" primary -> pre-prepare:", preprepare)
-
-    # Prepare: every node (including primary) broadcasts prepare
-    prepares = defaultdict(set)
-    for node in nodes:
-        prepares[(preprepare["view"], preprepare["seq"])].add(node.id)
-    print(" prepares received from nodes:", sorted(list(prepares[(0,1)])))
-
-    # If 2f+1 prepares reached, mark prepared
     f = (nodes_count - 1) // 3
-    prepared_quorum = 2 * f + 1
-    if len(prepares[(0,1)]) >= prepared_quorum:
-        print(f" prepared quorum reached ({len(prepares[(0,1)])} >= {prepared_quorum})")
-
-    # Commit: nodes broadcast commit; when 2f+1 commits, the request is executed
-    commits = prepares[(0,1)]  # in this small sim assume same nodes commit
-    if len(commits) >= prepared_quorum:
-        print(f" commit quorum reached ({len(commits)}). Request EXECUTED: {request}")
-    else:
-        print(" commit quorum NOT reached in this demo")
+    print(f"PBFT demo: n={nodes_count}, f={f}, primary=0, requests={requests}, "
+          f"byzantine={byzantine}, crashed={crashed}")
+    cfg = PBFTConfig(n=nodes_count, byzantine=byzantine, crashed=crashed,
+                     requests=requests, batch_size=max(1, requests))
+    res = run_pbft_simulation(cfg)
+    for name, count in res.messages.items():
+        print(f" {name:12s} messages: {count}")
+    print(f" quorum 2f+1 = {2 * f + 1}; committed {res.committed_requests}/{requests} request(s), "
+          f"commit latency {1000 * res.latency_mean:.1f} ms, {res.bytes} bytes on the wire")
+    return res
 
 # -------------------
-# Proof of Stake (PoS) - simple weighted proposer selection
+# Proof of Stake (PoS) - stake-weighted proposer selection
 # -------------------
+class FenwickTree:
+    # Prefix sums of stakes with O(log n) point updates and O(log n) sampling
+    def __init__(self, weights):
+        self.n = len(weights)
+        self.tree = [0.0] + [float(w) for w in weights]
+        for i in range(1, self.n + 1):
+            j = i + (i & -i)
+            if j <= self.n:
+                self.tree[j] += self.tree[i]
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        s, i = 0.0, self.n
+        while i > 0:
+            s += self.tree[i]
+            i -= i & -i
+        return s
+
+    def find(self, r):
+        # smallest index whose prefix sum exceeds r (0 <= r < total)
+        pos, step = 0, 1 << self.n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] <= r:
+                pos = nxt
+                r -= self.tree[nxt]
+            step >>= 1
+        return min(pos, self.n - 1)
+
+def build_alias_table(weights):
+    # Walker/Vose alias method: O(n) build, O(1) per sample
+    n = len(weights)
+    total = float(sum(weights))
+    prob = [w * n / total for w in weights]
+    alias = list(range(n))
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        alias[s] = l
+        prob[l] -= 1.0 - prob[s]
+        (small if prob[l] < 1.0 else large).append(l)
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
 class ProofOfStake:
-    def __init__(self, stakes):
+    # Static path: alias table, O(1) per pick and vectorised choose_proposers(n).
+    # Dynamic path: Fenwick tree, O(log n) per stake update and per pick. After
+    # an update the alias table is stale; single picks use the Fenwick tree and
+    # the next epoch-sized choose_proposers() rebuilds the table once.
+    # NumPy is only needed for the vectorised draws and is imported on first use.
+    def __init__(self, stakes, seed=None):
         # stakes: dict validator_id -> stake_amount (numeric)
         self.stakes = dict(stakes)
+        self.validators = list(self.stakes)
+        self.index = {v: i for i, v in enumerate(self.validators)}
+        self.seed = seed
+        # without a seed, follow the module-level random (reproducible via random.seed)
+        self.rng = random.Random(seed) if seed is not None else random
+        self.np_rng = None
+        self.fenwick = FenwickTree([self.stakes[v] for v in self.validators])
+        self._alias = None
+
+    def update_stake(self, validator, stake):
+        if validator not in self.index:
+            # new validator: rebuild the tree (O(n)), rare compared to updates
+            self.index[validator] = len(self.validators)
+            self.validators.append(validator)
+            self.stakes[validator] = stake
+            self.fenwick = FenwickTree([self.stakes[v] for v in self.validators])
+        else:
+            self.fenwick.add(self.index[validator], stake - self.stakes[validator])
+            self.stakes[validator] = stake
+        self._alias = None
+
+    def _alias_table(self):
+        if self._alias is None:
+            self._alias = build_alias_table([self.stakes[v] for v in self.validators])
+        return self._alias
 
     def choose_proposer(self):
-        total = sum(self.stakes.values())
-        if total == 0:
-            return random.choice(list(self.stakes.keys()))
-        r = random.random() * total
-        upto = 0
-        for v, s in self.stakes.items():
-            upto += s
-            if r <= upto:
-                return v
-        # fallback
-        return list(self.stakes.keys())[-1]
+        total = self.fenwick.total()
+        if total <= 0:
+            return self.rng.choice(self.validators)
+        if self._alias is not None:
+            prob, alias = self._alias
+            i = self.rng.randrange(len(prob))
+            return self.validators[i if self.rng.random() < prob[i] else alias[i]]
+        return self.validators[self.fenwick.find(self.rng.random() * total)]
+
+    def choose_proposers(self, n):
+        # proposers for n slots (e.g. a whole epoch) in one vectorised draw
+        if sum(self.stakes.values()) <= 0:
+            return [self.rng.choice(self.validators) for _ in range(n)]
+        return [self.validators[i] for i in self.choose_proposer_indices(n)]
+
+    def choose_proposer_indices(self, n):
+        import numpy as np
+        if self.np_rng is None:
+            seed = self.seed if self.seed is not None else self.rng.getrandbits(64)
+            self.np_rng = np.random.default_rng(seed)
+        prob, alias = (np.asarray(t) for t in self._alias_table())
+        cols = self.np_rng.integers(0, len(prob), n)
+        return np.where(self.np_rng.random(n) < prob[cols], cols, alias[cols])
+
+def stake_chi_square(pos, picks):
+    # Pearson chi-square of observed proposer counts vs. stake proportions, with
+    # an approximate p-value (Wilson-Hilferty normal approximation, no SciPy)
+    import numpy as np
+    counts = np.bincount(picks, minlength=len(pos.validators))
+    stakes = np.array([pos.stakes[v] for v in pos.validators], dtype=float)
+    expected = len(picks) * stakes / stakes.sum()
+    mask = expected > 0
+    chi2 = float((((counts - expected) ** 2)[mask] / expected[mask]).sum())
+    dof = int(mask.sum()) - 1
+    z = ((chi2 / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    p_value = 0.5 * math.erfc(z / math.sqrt(2))
+    return chi2, dof, p_value
 
 # -------------------
 # Demo runner
@@ -119,18 +373,66 @@ if __name__ == "__main__":
     nonce, h = pow_demo.mine("demo-block")
     elapsed = time.time() - start
     print(" mined nonce:", nonce, "hash:", h, f"(took {elapsed:.3f}s)")
+    # hash rate with and without midstate caching on a ~1 KB block payload
+    payload = "|".join(f"tx{i}" for i in range(250))
+    rate_pow = ProofOfWork(difficulty=64)  # unreachable: always runs all tries
+    for name, miner in (("naive", rate_pow.mine_naive), ("midstate", rate_pow.mine)):
+        start = time.time()
+        miner(payload, max_tries=100000)
+        print(f" {name:8s} hash rate: {100000 / (time.time() - start):,.0f} H/s")
+    # same search spread over all cores, at a higher difficulty
+    par = ProofOfWork(difficulty=5).mine_parallel("demo-block")
+    print(f" parallel (difficulty 5, {len(par['workers'])} workers): nonce {par['nonce']} "
+          f"found by worker {par['winner']} in {par['seconds']:.2f}s, "
+          f"{par['hash_rate']:,.0f} H/s aggregate")
+    for w in par["workers"]:
+        print(f"   worker {w['worker']}: {w['hashes']:,} hashes, {w['hash_rate']:,.0f} H/s")
+
+    print("\n==== Numeric target (compact bits) demo ====")
+    easy_bits = 0x1f0fffff        # ~ 1 in 4096 hashes
+    nonce, h = pow_demo.mine_target("demo-block", easy_bits)
+    print(f" bits {easy_bits:#010x} -> target {bits_to_target(easy_bits):#066x}")
+    print(" mined nonce:", nonce, "hash:", h)
+    for name, fn in (("hex prefix", lambda: ProofOfWork(64).mine("demo-block", 100000)),
+                     ("raw target", lambda: pow_demo.mine_target("demo-block", 0x03000001, 100000))):
+        start = time.time()
+        fn()
+        print(f" {name:10s} hash rate: {100000 / (time.time() - start):,.0f} H/s")
+
+    print(" retargeting every 144 blocks, network hash rate x4 after day 5 and /2 after day 12:")
+    rate = lambda t: 1e12 * (4 if t > 5 * 86400 else 1) * (0.5 if t > 12 * 86400 else 1)
+    for p in simulate_retargeting(rate, blocks=144 * 18):
+        print(f"  height {p['height']:5d}: mean block time {p['mean_block_time']:6.0f}s, "
+              f"difficulty {p['difficulty']:10.2f}, bits {p['bits']:#010x}")
 
     print("\n==== Proof of Authority demo ====")
     poa = ProofOfAuthority(validators=["A", "B", "C"])
     for r in range(3):
         blk = poa.create_block(r, payload=f"tx{r}")
-        print(" round", r, "proposer:", blk["proposer"], "signature:", blk["signature"])
+        print(" round", r, "proposer:", blk["proposer"], "signature valid:", poa.verify_block(blk))
+    forged = dict(blk, payload="tx2 + 1000 BTC to Mallory")
+    print(" altered payload, signature valid:", poa.verify_block(forged))
 
     print("\n==== PBFT demo ====")
     run_pbft(nodes_count=4)
+    run_pbft(nodes_count=7, requests=20, byzantine=1, crashed=1)
 
     print("\n==== Proof of Stake demo ====")
     stakes = {"Alice": 50, "Bob": 30, "Carol": 20}
-    pos = ProofOfStake(stakes)
+    pos = ProofOfStake(stakes, seed=42)
     picks = Counter(pos.choose_proposer() for _ in range(1000))
     print(" proposer distribution over 1000 picks (approx proportional to stake):", picks)
+
+    # 10k validators, 1M slots: alias table for the epoch, Fenwick tree for updates
+    rng = random.Random(7)
+    big = ProofOfStake({f"v{i}": rng.randint(1, 1000) for i in range(10000)}, seed=7)
+    start = time.time()
+    slots = big.choose_proposer_indices(1000000)
+    print(f" 1M proposers over 10k validators in {time.time() - start:.2f}s (alias table)")
+    chi2, dof, p = stake_chi_square(big, slots)
+    print(f" chi-square vs stake proportions: {chi2:.0f} on {dof} dof, p = {p:.3f}")
+    start = time.time()
+    for _ in range(10000):
+        big.update_stake(f"v{rng.randrange(10000)}", rng.randint(1, 1000))
+        big.choose_proposer()
+    print(f" 10k stake updates + picks in {time.time() - start:.2f}s (Fenwick tree)")
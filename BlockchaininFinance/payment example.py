@@ -2,13 +2,22 @@
 # - Simple in-memory ledger with accounts and balances
 # - Transactions are created, 'signed' (mock), and applied after verification
 # - Use this to illustrate on-chain payments, double-spend checks, and mempool processing
+# - Mempool indexed by sender: nonce-ordered queues, pending balances (queued
+#   transactions cannot jointly overspend), fee-priority block building,
+#   replace-by-fee and size-bounded eviction, O(log n) per operation
+# - Blocks are re-validated and applied atomically from aggregated per-account
+#   deltas, with an undo journal (revert_block) and per-block timing
 #
-# Run: python3 payment_example.py
+# Run: python3 payment_example.py [--bench [N]]
 
+import argparse
 import hashlib
+import heapq
+import itertools
+import random
 import time
 import json
-from collections import defaultdict
+from collections import defaultdict, deque, namedtuple
 
 def mock_sign(private_key, message):
     # Mock signature: hash of private_key + message (for demo only)
@@ -19,11 +28,12 @@ def mock_verify(public_key, message, signature):
     return mock_sign(public_key, message) == signature
 
 class Transaction:
-    def __init__(self, from_acct, to_acct, amount, nonce, signature=None):
+    def __init__(self, from_acct, to_acct, amount, nonce, signature=None, fee=0):
         self.from_acct = from_acct
         self.to_acct = to_acct
         self.amount = amount
         self.nonce = nonce
+        self.fee = fee          # paid to the block producer; orders the mempool
         self.signature = signature
         self.timestamp = time.time()
 
@@ -33,45 +43,404 @@ class Transaction:
             "to": self.to_acct,
             "amount": self.amount,
             "nonce": self.nonce,
+            "fee": self.fee,
             "timestamp": self.timestamp
         }, sort_keys=True)
 
     def sign(self, private_key):
         self.signature = mock_sign(private_key, self.payload())
 
+class SenderQueue:
+    # Pending transactions of one sender keyed by nonce. Nonces lo..hi are
+    # contiguous: only the head (lo) can be mined next, only the tail (hi) evicted.
+    __slots__ = ("txs", "lo", "hi", "spend")
+
+    def __init__(self, next_nonce):
+        self.txs = {}
+        self.lo = next_nonce
+        self.hi = next_nonce - 1
+        self.spend = 0          # amount + fee of everything queued
+
+class Mempool:
+    # Indexed mempool, O(log n) per add / select / evict:
+    # - queues: sender -> SenderQueue (nonce order, pending spend)
+    # - heads:  max-heap by fee of every sender's next minable transaction
+    # - tails:  min-heap by fee of every sender's last transaction (eviction)
+    # Heap entries go stale when a transaction is mined, replaced or evicted;
+    # they are skipped on pop and the heaps are rebuilt once mostly stale.
+    REPLACE_BUMP = 1.1          # replace-by-fee needs a 10% higher fee
+
+    def __init__(self, ledger, max_size=100000):
+        self.ledger = ledger
+        self.max_size = max_size
+        self.queues = {}
+        self.size = 0
+        self.heads = []
+        self.tails = []
+        self.seq = itertools.count()
+        self.evicted = 0
+
+    def __len__(self):
+        return self.size
+
+    def pending_nonce(self, acct):
+        # next nonce the account should use
+        q = self.queues.get(acct)
+        return q.hi + 1 if q else self.ledger.nonces.get(acct, 0) + 1
+
+    def pending_balance(self, acct):
+        # confirmed balance minus everything the account has queued
+        q = self.queues.get(acct)
+        return self.ledger.balances.get(acct, 0) - (q.spend if q else 0)
+
+    def add(self, tx):
+        # returns None if accepted, else the reason for rejecting tx
+        if tx.amount <= 0 or tx.fee < 0:
+            return "Invalid amount"
+        cost = tx.amount + tx.fee
+        q = self.queues.get(tx.from_acct)
+        if q and q.lo <= tx.nonce <= q.hi:
+            return self._replace(q, tx, cost)
+        if tx.nonce != self.pending_nonce(tx.from_acct):
+            return "Invalid nonce (possible replay or missing txs)"
+        if self.pending_balance(tx.from_acct) < cost:
+            return "Insufficient funds (including pending txs)"
+        if self.size >= self.max_size:
+            victim = self._lowest_tail()
+            # the sender's own tail cannot make room: tx would follow a gap
+            if victim is None or victim.fee >= tx.fee or victim.from_acct == tx.from_acct:
+                return "Mempool full, fee too low"
+            self._evict(victim)
+            q = self.queues.get(tx.from_acct)
+        if q is None:
+            q = self.queues[tx.from_acct] = SenderQueue(tx.nonce)
+        q.txs[tx.nonce] = tx
+        q.hi = tx.nonce
+        q.spend += cost
+        self.size += 1
+        self._push_tail(tx)
+        if tx.nonce == q.lo:
+            self._push_head(tx)
+        return None
+
+    def _replace(self, q, tx, cost):
+        old = q.txs[tx.nonce]
+        if tx.fee < old.fee * self.REPLACE_BUMP or tx.fee <= old.fee:
+            return "Replacement fee too low"
+        old_cost = old.amount + old.fee
+        if self.pending_balance(tx.from_acct) + old_cost < cost:
+            return "Insufficient funds (including pending txs)"
+        q.txs[tx.nonce] = tx
+        q.spend += cost - old_cost
+        if tx.nonce == q.lo:
+            self._push_head(tx)
+        if tx.nonce == q.hi:
+            self._push_tail(tx)
+        return None
+
+    def select(self, max_txs):
+        # highest-fee transactions for the next block, each sender in nonce order;
+        # selected transactions leave the mempool
+        block = []
+        while self.heads and len(block) < max_txs:
+            tx = heapq.heappop(self.heads)[2]
+            q = self.queues.get(tx.from_acct)
+            if q is None or q.lo != tx.nonce or q.txs.get(tx.nonce) is not tx:
+                continue                                    # stale entry
+            del q.txs[q.lo]
+            q.lo += 1
+            q.spend -= tx.amount + tx.fee
+            self.size -= 1
+            if q.lo > q.hi:
+                del self.queues[tx.from_acct]
+            else:
+                self._push_head(q.txs[q.lo])
+            block.append(tx)
+        return block
+
+    def requeue(self, txs):
+        # Put the txs of a rejected or reverted block back. Each sender's queue is
+        # rebuilt in nonce order through add(), so a tx that is no longer valid
+        # against the confirmed state is dropped together with the txs behind it
+        # (they would follow a nonce gap). Returns the dropped txs.
+        by_sender = defaultdict(list)
+        for tx in txs:
+            by_sender[tx.from_acct].append(tx)
+        dropped = []
+        for sender, own in by_sender.items():
+            q = self.queues.pop(sender, None)
+            if q is not None:
+                self.size -= len(q.txs)
+                own.extend(q.txs.values())
+            own.sort(key=lambda tx: tx.nonce)
+            for i, tx in enumerate(own):
+                if self.add(tx) is not None:
+                    dropped.extend(own[i:])
+                    break
+        return dropped
+
+    def _lowest_tail(self):
+        while self.tails:
+            tx = self.tails[0][2]
+            q = self.queues.get(tx.from_acct)
+            if q is not None and q.hi == tx.nonce and q.txs.get(tx.nonce) is tx:
+                return tx
+            heapq.heappop(self.tails)                       # stale entry
+        return None
+
+    def _evict(self, tx):
+        q = self.queues[tx.from_acct]
+        del q.txs[q.hi]
+        q.hi -= 1
+        q.spend -= tx.amount + tx.fee
+        self.size -= 1
+        self.evicted += 1
+        if q.hi < q.lo:
+            del self.queues[tx.from_acct]
+        else:
+            self._push_tail(q.txs[q.hi])
+
+    def _push_head(self, tx):
+        heapq.heappush(self.heads, (-tx.fee, next(self.seq), tx))
+        if len(self.heads) > 2 * len(self.queues) + 1024:
+            self._compact()
+
+    def _push_tail(self, tx):
+        heapq.heappush(self.tails, (tx.fee, next(self.seq), tx))
+        if len(self.tails) > 2 * len(self.queues) + 1024:
+            self._compact()
+
+    def _compact(self):
+        # one live head and tail per sender; drop every stale entry (amortised O(1))
+        self.heads = [(-q.txs[q.lo].fee, next(self.seq), q.txs[q.lo]) for q in self.queues.values()]
+        self.tails = [(q.txs[q.hi].fee, next(self.seq), q.txs[q.hi]) for q in self.queues.values()]
+        heapq.heapify(self.heads)
+        heapq.heapify(self.tails)
+
+# per-block timing record kept in Ledger.block_log
+BlockStats = namedtuple("BlockStats", "height txs accounts validate_ms apply_ms")
+
 class Ledger:
-    def __init__(self):
+    def __init__(self, max_mempool=100000, verbose=True, journal_depth=100):
         self.balances = defaultdict(int)
         self.nonces = defaultdict(int)
-        self.mempool = []
+        self.mempool = Mempool(self, max_mempool)
+        self.verbose = verbose
+        self.height = 0
+        self.journal = deque(maxlen=journal_depth)    # (undo record, txs) of the latest blocks
+        self.block_log = []
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
 
     def submit_tx(self, tx):
-        # Basic verification: signature, nonce, balance
+        # Basic verification: signature, then nonce and balance against
+        # confirmed state plus this sender's pending transactions
         if not mock_verify(tx.from_acct, tx.payload(), tx.signature):
-            print("Invalid signature — reject tx")
+            self.log("Invalid signature — reject tx")
             return False
-        if tx.nonce != self.nonces[tx.from_acct] + 1:
-            print("Invalid nonce — possible replay or missing txs")
-            return False
-        if self.balances[tx.from_acct] < tx.amount:
-            print("Insufficient funds — reject tx")
+        reason = self.mempool.add(tx)
+        if reason:
+            self.log(f"{reason} — reject tx")
             return False
         # Accept to mempool
-        self.mempool.append(tx)
-        print("Tx accepted to mempool")
+        self.log("Tx accepted to mempool")
+        return True
+
+    def mine_block(self, max_txs=1000, miner="miner"):
+        # Build the block from the highest-fee minable transactions and apply it;
+        # if the block is rejected its valid txs go back to the mempool
+        txs = self.mempool.select(max_txs)
+        self.log("Mining block with", len(txs), "tx(s)")
+        if not self.apply_block(txs, miner):
+            dropped = self.mempool.requeue(txs)
+            self.log(f"Block rejected — {len(txs) - len(dropped)} tx(s) back to the mempool, "
+                     f"{len(dropped)} dropped")
+            return []
+        return txs
+
+    def apply_block(self, txs, miner="miner", verify_signatures=False):
+        # All or nothing: aggregate per-account deltas over the whole block,
+        # validate them in one pass, then write each touched account once.
+        # Funds received in the same block are not spendable (as in the mempool).
+        t0 = time.perf_counter()
+        balances, nonces = self.balances, self.nonces
+        delta = {}          # account -> net balance change
+        spent = {}          # sender -> amount + fee sent in this block
+        sent = {}           # sender -> number of txs in this block
+        fees = 0
+        for tx in txs:
+            sender = tx.from_acct
+            k = sent.get(sender, 0) + 1
+            if tx.nonce != nonces.get(sender, 0) + k:
+                return self._reject(f"invalid nonce {tx.nonce} from {sender}")
+            if tx.amount <= 0 or tx.fee < 0:
+                return self._reject(f"invalid amount from {sender}")
+            if verify_signatures and not mock_verify(sender, tx.payload(), tx.signature):
+                return self._reject(f"invalid signature from {sender}")
+            sent[sender] = k
+            cost = tx.amount + tx.fee
+            spent[sender] = spent.get(sender, 0) + cost
+            delta[sender] = delta.get(sender, 0) - cost
+            delta[tx.to_acct] = delta.get(tx.to_acct, 0) + tx.amount
+            fees += tx.fee
+        if fees:
+            delta[miner] = delta.get(miner, 0) + fees
+        for sender, total in spent.items():
+            if balances.get(sender, 0) < total:
+                return self._reject(f"insufficient funds for {sender}")
+        t1 = time.perf_counter()
+
+        # undo record first (None = account did not exist), then the writes
+        undo = ({a: balances.get(a) for a in delta}, {a: nonces.get(a) for a in sent})
+        try:
+            for acct, d in delta.items():
+                balances[acct] += d
+            for acct, k in sent.items():
+                nonces[acct] += k
+        except BaseException:
+            self._undo(undo)
+            raise
+        self.journal.append((undo, list(txs)))
+        self.height += 1
+        stats = BlockStats(self.height, len(txs), len(delta), 1000 * (t1 - t0),
+                           1000 * (time.perf_counter() - t1))
+        self.block_log.append(stats)
+        self.log(f"Block {stats.height} applied: {stats.txs} tx(s), {stats.accounts} account(s), "
+                 f"validate {stats.validate_ms:.2f} ms, apply {stats.apply_ms:.2f} ms")
+        return True
+
+    def revert_block(self):
+        # Roll back the most recent block (e.g. on a reorg) and return its txs to
+        # the mempool; False if nothing to undo
+        if not self.journal:
+            return False
+        undo, txs = self.journal.pop()
+        self._undo(undo)
+        self.height -= 1
+        dropped = self.mempool.requeue(txs)
+        self.log(f"Block {self.height + 1} reverted — {len(txs) - len(dropped)} tx(s) back to the mempool")
         return True
 
-    def mine_block(self):
-        # Very simple block application: apply all mempool txs in order
-        print("Mining block with", len(self.mempool), "tx(s)")
-        for tx in self.mempool:
-            self.balances[tx.from_acct] -= tx.amount
-            self.balances[tx.to_acct] += tx.amount
-            self.nonces[tx.from_acct] += 1
-        self.mempool = []
-        print("Block applied")
+    def _undo(self, undo):
+        for table, old in zip((self.balances, self.nonces), undo):
+            for acct, value in old.items():
+                if value is None:
+                    table.pop(acct, None)
+                else:
+                    table[acct] = value
+
+    def _reject(self, reason):
+        self.log(f"Invalid block: {reason} — nothing applied")
+        return False
+
+def benchmark_mempool(n=1000000, senders=100000, block_size=10000, seed=0):
+    # Throughput of the indexed mempool at n queued transactions (signatures are
+    # not part of the measurement: Mempool.add is called directly)
+    rng = random.Random(seed)
+    ledger = Ledger(max_mempool=n, verbose=False)
+    senders = max(1, min(senders, n))      # at least one queued tx per sender
+    accounts = [f"acct{i}" for i in range(senders)]
+    for a in accounts:
+        ledger.balances[a] = 10 ** 9
+    supply = sum(ledger.balances.values())
+
+    def make(k, low, high):
+        return [Transaction(a, rng.choice(accounts), rng.randint(1, 100), nonce=k, fee=rng.randint(low, high))
+                for a in accounts]
+    txs = [tx for k in range(1, n // senders + 1) for tx in make(k, 1, 1000)]
+    start = time.perf_counter()
+    for tx in txs:
+        err = ledger.mempool.add(tx)
+        if err is not None:
+            raise RuntimeError(f"benchmark tx rejected: {err}")
+    t_add = time.perf_counter() - start
+    print(f" add:    {len(txs):>9,} txs in {t_add:6.2f}s  {len(txs) / t_add:>10,.0f} tx/s "
+          f"(mempool {len(ledger.mempool):,})")
+
+    # full mempool: higher-fee transactions evict the cheapest tails
+    extra = make(n // senders + 1, 500, 2000)[:n // 10]
+    start = time.perf_counter()
+    accepted = sum(ledger.mempool.add(tx) is None for tx in extra)
+    t_evict = time.perf_counter() - start
+    print(f" evict:  {len(extra):>9,} txs in {t_evict:6.2f}s  {len(extra) / t_evict:>10,.0f} tx/s "
+          f"({accepted:,} accepted, {ledger.mempool.evicted:,} evicted)")
+
+    start = time.perf_counter()
+    blocks, first_fee, last_fee = 0, None, None
+    while len(ledger.mempool):
+        block = ledger.mine_block(block_size)
+        if not block:
+            raise RuntimeError("mempool not empty but no block could be mined")
+        fee = sum(tx.fee for tx in block) / len(block)
+        first_fee = fee if first_fee is None else first_fee
+        last_fee = fee
+        blocks += 1
+    t_mine = time.perf_counter() - start
+    mined = accepted + len(txs) - ledger.mempool.evicted
+    fees = f", mean fee {first_fee:.0f} in the first, {last_fee:.0f} in the last" if blocks else ""
+    print(f" select: {mined:>9,} txs in {t_mine:6.2f}s  {mined / t_mine:>10,.0f} tx/s "
+          f"({blocks} blocks{fees})")
+    if sum(ledger.balances.values()) != supply or any(v < 0 for v in ledger.balances.values()):
+        raise RuntimeError("mining changed the money supply or overdrew an account")
+
+def benchmark_blocks(block_sizes=(1000, 10000, 100000), accounts=10000, seed=0):
+    # Per-tx defaultdict updates (the old mine_block, no checks) versus the
+    # validated, atomic apply_block on the same blocks
+    rng = random.Random(seed)
+    names = [f"acct{i}" for i in range(accounts)]
+    print(f"{'block':>8} {'unchecked tx/s':>15} {'apply_block tx/s':>17} {'validate ms':>12} "
+          f"{'apply ms':>9} {'accounts':>9}")
+    for size in block_sizes:
+        nonce = defaultdict(int)
+        txs = []
+        for _ in range(size):
+            sender = rng.choice(names)
+            nonce[sender] += 1
+            txs.append(Transaction(sender, rng.choice(names), rng.randint(1, 100),
+                                   nonce=nonce[sender], fee=rng.randint(0, 5)))
+        plain, ledger = Ledger(verbose=False), Ledger(verbose=False)
+        for a in names:
+            plain.balances[a] = ledger.balances[a] = 10 ** 6
+
+        start = time.perf_counter()
+        for tx in txs:
+            plain.balances[tx.from_acct] -= tx.amount + tx.fee
+            plain.balances[tx.to_acct] += tx.amount
+            if tx.fee:
+                plain.balances["miner"] += tx.fee
+            plain.nonces[tx.from_acct] += 1
+        t_plain = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ok = ledger.apply_block(txs)
+        t_block = time.perf_counter() - start
+        if not ok or ledger.balances != plain.balances or ledger.nonces != plain.nonces:
+            raise RuntimeError("apply_block disagrees with the unchecked replay")
+        st = ledger.block_log[-1]
+        print(f"{size:>8,} {size / t_plain:>15,.0f} {size / t_block:>17,.0f} {st.validate_ms:>12.2f} "
+              f"{st.apply_ms:>9.2f} {st.accounts:>9,}")
+
+        # revert undoes the block; an overspending tx at the end rejects the whole block
+        reverted = ledger.revert_block()
+        if not reverted or any(ledger.balances[a] != 10 ** 6 for a in names):
+            raise RuntimeError("revert_block did not restore the balances")
+        if len(ledger.mempool) != min(size, ledger.mempool.max_size):
+            raise RuntimeError("reverted txs were not returned to the mempool")
+        snapshot = dict(ledger.balances)
+        last = txs[-1].from_acct
+        bad = txs + [Transaction(last, "Mallory", 10 ** 7, nonce=nonce[last] + 1)]
+        ok = ledger.apply_block(bad)
+        if ok or ledger.balances != snapshot or ledger.height != 0:
+            raise RuntimeError("overspending block was not rejected atomically")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", type=int, nargs="?", const=1000000, default=0,
+                        help="also benchmark the mempool with N queued txs (default 1M)")
+    args = parser.parse_args()
+
     # Demo run
     ledger = Ledger()
     # Setup accounts (for demo, public_key == private_key)
@@ -88,7 +457,19 @@ if __name__ == "__main__":
     # Attempt double spend: Alice tries to reuse same nonce
     tx2 = Transaction("Alice", "Carol", 80, nonce=1)
     tx2.sign("Alice")
-    ledger.submit_tx(tx2)  # should fail nonce or insufficient funds if nonce allowed
+    ledger.submit_tx(tx2)  # should fail: nonce 1 is pending, replacing it needs a higher fee
+
+    # Alice queues a second payment: 30 is already pending, so 80 more would overspend
+    tx2b = Transaction("Alice", "Carol", 80, nonce=2)
+    tx2b.sign("Alice")
+    ledger.submit_tx(tx2b)
+
+    # Replace-by-fee: same nonce, higher fee
+    tx1b = Transaction("Alice", "Bob", 30, nonce=1, fee=1)
+    tx1b.sign("Alice")
+    ledger.submit_tx(tx1b)
+    print("Alice pending balance:", ledger.mempool.pending_balance("Alice"),
+          "next nonce:", ledger.mempool.pending_nonce("Alice"))
 
     ledger.mine_block()
     print("Balances after block:", dict(ledger.balances))
@@ -99,3 +480,13 @@ if __name__ == "__main__":
     ledger.submit_tx(tx3)
     ledger.mine_block()
     print("Final balances:", dict(ledger.balances))
+
+    # Undo the last block from the journal
+    ledger.revert_block()
+    print("Balances after revert:", dict(ledger.balances), "| mempool:", len(ledger.mempool), "tx(s)")
+
+    if args.bench:
+        print(f"\nMempool benchmark ({args.bench:,} queued txs)")
+        benchmark_mempool(args.bench)
+        print("\nBlock application benchmark")
+        benchmark_blocks()
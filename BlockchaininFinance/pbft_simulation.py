@@ -0,0 +1,277 @@
+# Message-level PBFT simulation (normal-case operation, fixed view)
+# - every replica really sends and counts PRE-PREPARE / PREPARE / COMMIT messages
+# - Byzantine replicas equivocate (vote for a wrong digest), crashed replicas stay silent
+# - the primary batches client requests; replicas execute in sequence order
+# - checkpoints every K sequence numbers; a stable checkpoint (2f+1 votes)
+#   garbage-collects the replica's message log
+# - reports message counts and bytes (O(n^2) per batch) and commit latency
+#
+# Messages are plain tuples in a calendar queue (time is discretised into ticks;
+# a heap holds only the distinct pending ticks, each tick a FIFO list of
+# messages), and votes are kept as integer bitmasks of sender ids, so
+# n = 256 replicas runs in seconds.
+# View changes are out of scope: the primary (replica 0) is always correct.
+#
+# Run: python3 pbft_simulation.py
+
+import heapq
+import random
+import time
+from dataclasses import dataclass, field
+
+PRE_PREPARE, PREPARE, COMMIT, CHECKPOINT, REPLY, PROPOSE = range(6)
+MSG_NAMES = ["pre-prepare", "prepare", "commit", "checkpoint", "reply"]
+
+HONEST, BYZANTINE, CRASHED = range(3)
+HEADER_BYTES = 48        # type, view, seq, digest, sender
+SIGNATURE_BYTES = 64
+REQUEST_BYTES = 250
+
+@dataclass
+class PBFTConfig:
+    n: int = 4
+    byzantine: int = 0
+    crashed: int = 0
+    requests: int = 1000
+    request_rate: float = 2000.0      # client requests per second
+    batch_size: int = 10
+    batch_timeout: float = 0.005      # seconds the primary waits to fill a batch
+    checkpoint_interval: int = 10     # K
+    latency: float = 0.005            # one-way link latency (seconds)
+    jitter: float = 0.002             # per-link extra latency, uniform [0, jitter]
+    tick: float = 0.0001              # event-queue time resolution (seconds)
+    seed: int = 0
+    request_bytes: int = REQUEST_BYTES
+    arrivals: list = None             # client request times; default: Poisson at request_rate
+
+@dataclass
+class PBFTResult:
+    n: int
+    f: int
+    batches: int
+    committed_requests: int
+    messages: dict = field(default_factory=dict)
+    bytes: int = 0
+    latency_mean: float = 0.0
+    latency_p50: float = 0.0
+    latency_p99: float = 0.0
+    max_log_entries: int = 0
+    stable_checkpoint: int = 0
+    sim_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def total_messages(self):
+        return sum(self.messages.values())
+
+def run_pbft_simulation(cfg):
+    wall_start = time.time()
+    rng = random.Random(cfg.seed)
+    n = cfg.n
+    f = (n - 1) // 3
+    if cfg.byzantine + cfg.crashed > f:
+        raise ValueError(f"n={n} tolerates at most f={f} faulty replicas")
+
+    # replica 0 is the (correct) primary; faulty replicas are picked among the backups
+    status = [HONEST] * n
+    faulty = rng.sample(range(1, n), cfg.byzantine + cfg.crashed)
+    for r in faulty[:cfg.byzantine]:
+        status[r] = BYZANTINE
+    for r in faulty[cfg.byzantine:]:
+        status[r] = CRASHED
+    # per sender: destinations grouped by link latency in ticks, so a broadcast
+    # touches one queue bucket per distinct latency instead of one heap entry per message
+    link_groups = []
+    for src in range(n):
+        groups = {}
+        for dst in range(n):
+            if dst != src:
+                delay = cfg.latency + rng.random() * cfg.jitter
+                groups.setdefault(max(1, round(delay / cfg.tick)), []).append(dst)
+        link_groups.append(sorted(groups.items()))
+    reply_delay = max(1, round(cfg.latency / cfg.tick))
+
+    # per-replica message log: seq -> [digest, prepare mask, prepare count,
+    #                                  commit mask, commit count, phase]
+    # phase 0 = pre-prepared, 1 = prepared, 2 = committed-local, 3 = executed
+    logs = [dict() for _ in range(n)]
+    early = [dict() for _ in range(n)]          # votes that arrived before the pre-prepare
+    last_executed = [0] * n
+    checkpoint_votes = [dict() for _ in range(n)]
+    stable = [0] * n
+
+    counts = [0] * len(MSG_NAMES)
+    total_bytes = 0
+    max_log = 0
+    buckets = {}                                # tick -> [(dst, kind, seq, digest, src), ...]
+    ticks = []                                  # heap of ticks that have a bucket
+
+    def bucket(tk):
+        b = buckets.get(tk)
+        if b is None:
+            b = buckets[tk] = []
+            heapq.heappush(ticks, tk)
+        return b
+
+    def broadcast(tk, src, kind, seq, digest, size=HEADER_BYTES + SIGNATURE_BYTES):
+        nonlocal total_bytes
+        counts[kind] += n - 1
+        total_bytes += (n - 1) * size
+        bucket(tk).append((src, kind, seq, digest, src))    # own copy, no network
+        for delay, dsts in link_groups[src]:
+            bucket(tk + delay).extend([(dst, kind, seq, digest, src) for dst in dsts])
+
+    def reply(tk, src, seq, digest):
+        nonlocal total_bytes
+        counts[REPLY] += 1
+        total_bytes += HEADER_BYTES + SIGNATURE_BYTES
+        bucket(tk + reply_delay).append((-1, REPLY, seq, digest, src))
+
+    # --- client requests and primary batching ---
+    arrivals = cfg.arrivals
+    if arrivals is None:
+        arrivals = []
+        t = 0.0
+        for _ in range(cfg.requests):
+            t += rng.expovariate(cfg.request_rate)
+            arrivals.append(t)
+    batches = []                                # (propose time, [arrival times])
+    i = 0
+    while i < len(arrivals):
+        deadline = arrivals[i] + cfg.batch_timeout
+        j = i
+        while j < len(arrivals) and j - i < cfg.batch_size and arrivals[j] <= deadline:
+            j += 1
+        close = arrivals[j - 1] if j - i == cfg.batch_size else deadline
+        batches.append((close, arrivals[i:j]))
+        i = j
+    for seq, (close, _) in enumerate(batches, start=1):
+        bucket(round(close / cfg.tick)).append((0, PROPOSE, seq, seq, 0))
+
+    replies = [0] * (len(batches) + 1)
+    done_at = [None] * (len(batches) + 1)
+
+    def vote(r, now, kind, seq, digest, sender):
+        entry = logs[r].get(seq)
+        if entry is None:
+            if seq > stable[r]:
+                early[r].setdefault(seq, []).append((kind, digest, sender))
+            return
+        if digest != entry[0]:
+            return                              # equivocating / wrong digest
+        bit = 1 << sender
+        if kind == PREPARE:
+            if entry[1] & bit:
+                return
+            entry[1] |= bit
+            entry[2] += 1
+            # prepared: pre-prepare + 2f matching prepares from backups
+            if entry[5] == 0 and entry[2] >= 2 * f:
+                entry[5] = 1
+                broadcast(now, r, COMMIT, seq, digest)
+        else:
+            if entry[3] & bit:
+                return
+            entry[3] |= bit
+            entry[4] += 1
+        # committed-local: prepared + 2f+1 matching commits
+        if entry[5] == 1 and entry[4] >= 2 * f + 1:
+            entry[5] = 2
+            execute(r, now)
+
+    def execute(r, now):
+        log = logs[r]
+        while True:
+            entry = log.get(last_executed[r] + 1)
+            if entry is None or entry[5] != 2:
+                return
+            entry[5] = 3
+            seq = last_executed[r] = last_executed[r] + 1
+            reply(now, r, seq, entry[0])
+            if seq % cfg.checkpoint_interval == 0:
+                broadcast(now, r, CHECKPOINT, seq, seq)
+
+    def garbage_collect(r, seq):
+        stable[r] = seq
+        log = logs[r]
+        for s in [s for s in log if s <= seq]:
+            del log[s]
+        for s in [s for s in checkpoint_votes[r] if s <= seq]:
+            del checkpoint_votes[r][s]
+        for s in [s for s in early[r] if s <= seq]:
+            del early[r][s]
+
+    now = 0
+    while ticks:
+        now = heapq.heappop(ticks)
+        queue = buckets[now]
+        i = 0
+        while i < len(queue):                   # may grow while we process it
+            r, kind, seq, digest, sender = queue[i]
+            i += 1
+
+            if r == -1:                             # reply reached the client
+                if status[sender] == HONEST:
+                    replies[seq] += 1
+                    if replies[seq] == f + 1:       # client accepts on f+1 matching replies
+                        done_at[seq] = now
+                continue
+            if status[r] == CRASHED:
+                continue
+
+            if kind == PROPOSE:
+                size = HEADER_BYTES + SIGNATURE_BYTES + cfg.request_bytes * len(batches[seq - 1][1])
+                broadcast(now, 0, PRE_PREPARE, seq, digest, size)
+
+            elif kind == PRE_PREPARE:
+                if seq in logs[r] or seq <= stable[r]:
+                    continue
+                logs[r][seq] = [digest, 0, 0, 0, 0, 0]
+                if r != 0 and status[r] == HONEST:
+                    max_log = max(max_log, len(logs[r]))
+                if r != 0:
+                    d = digest if status[r] == HONEST else -digest      # Byzantine: wrong digest
+                    broadcast(now, r, PREPARE, seq, d)
+                for k, d, s in early[r].pop(seq, ()):
+                    vote(r, now, k, seq, d, s)
+
+            elif kind in (PREPARE, COMMIT):
+                vote(r, now, kind, seq, digest, sender)
+
+            elif kind == CHECKPOINT:
+                if seq <= stable[r]:
+                    continue
+                votes = checkpoint_votes[r].get(seq, 0) | (1 << sender)
+                checkpoint_votes[r][seq] = votes
+                if bin(votes).count("1") >= 2 * f + 1:
+                    garbage_collect(r, seq)
+        del buckets[now]
+
+    latencies = sorted(done_at[seq] * cfg.tick - a
+                       for seq, (_, batch) in enumerate(batches, start=1)
+                       if done_at[seq] is not None for a in batch)
+    result = PBFTResult(n=n, f=f, batches=len(batches), committed_requests=len(latencies))
+    result.messages = dict(zip(MSG_NAMES, counts))
+    result.bytes = total_bytes
+    if latencies:
+        result.latency_mean = sum(latencies) / len(latencies)
+        result.latency_p50 = latencies[len(latencies) // 2]
+        result.latency_p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    result.max_log_entries = max_log
+    result.stable_checkpoint = max(stable[r] for r in range(n) if status[r] == HONEST)
+    result.sim_seconds = now * cfg.tick
+    result.wall_seconds = time.time() - wall_start
+    return result
+
+if __name__ == "__main__":
+    print(f"{'n':>4} {'f':>3} {'byz':>3} {'crash':>5} {'msgs/batch':>11} {'KB/batch':>9} "
+          f"{'lat p50 ms':>10} {'lat p99 ms':>10} {'max log':>7} {'wall s':>7}")
+    for n in (4, 16, 64, 128, 256):
+        f = (n - 1) // 3
+        for byz, crash in ((0, 0), (f // 2, f - f // 2)):
+            cfg = PBFTConfig(n=n, byzantine=byz, crashed=crash, requests=400, batch_size=40)
+            res = run_pbft_simulation(cfg)
+            assert res.committed_requests == cfg.requests
+            print(f"{n:>4} {f:>3} {byz:>3} {crash:>5} {res.total_messages / res.batches:>11,.0f} "
+                  f"{res.bytes / res.batches / 1024:>9,.0f} {1000 * res.latency_p50:>10.1f} "
+                  f"{1000 * res.latency_p99:>10.1f} {res.max_log_entries:>7} {res.wall_seconds:>7.2f}")
@@ -0,0 +1,384 @@
+# Proof-of-Authority engine with a dynamic validator set and signed blocks
+# - blocks are signed with Schnorr signatures (deterministic nonces) in the
+#   order-Q subgroup of Z_P^*, P = 2Q + 1 a safe prime
+# - validators vote in block headers to add or remove a validator; a proposal
+#   that gathers votes from a majority of the current set takes effect at the
+#   next epoch boundary (Clique-style), so the proposer of any height is known
+#   from that epoch's snapshot: O(1) lookup, validators[height % len]
+# - syncing many blocks checks headers in order and verifies all signatures of
+#   a batch with one randomised multi-exponentiation; if the batch fails the
+#   engine rolls back and re-imports one by one to find the bad block
+#
+# The 256-bit group keeps the demo fast; it is NOT a secure size (use an
+# elliptic curve such as Ed25519 or a >= 2048-bit group in practice).
+#
+# Run: python3 poa_engine.py [--blocks 1000000]
+
+import argparse
+import hashlib
+import secrets
+import time
+from collections import namedtuple
+
+# P = derive_safe_prime(b"PoA Schnorr group"), G = 4 = 2^2 generates the order-Q subgroup
+P = 0xab2bf4f7f7e416036d787463f298093e43ae60fd70e1ad344650f372a25d643b
+Q = (P - 1) // 2
+G = 4
+BATCH_COEFF_BITS = 64       # random batch coefficients: a forged batch passes with prob. 2^-64
+
+def _is_probable_prime(n):
+    if n < 2:
+        return False
+    small = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+    for sp in small:
+        if n % sp == 0:
+            return n == sp
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in small:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def derive_safe_prime(label, bits=256):
+    # nothing-up-my-sleeve parameters: the first safe prime 2q+1 with q >= SHA-256(label)
+    q = int.from_bytes(hashlib.sha256(label).digest(), "big") >> (257 - bits) | (1 << (bits - 2))
+    while not (_is_probable_prime(q) and _is_probable_prime(2 * q + 1)):
+        q += 1
+    return 2 * q + 1
+
+# ------------------------------------------
+# Schnorr signatures
+# ------------------------------------------
+class FixedBase:
+    # comb table: rows[i][d] = base^(d * 2^(w*i)), so base^e costs one
+    # multiplication per w-bit window of e instead of a full square-and-multiply
+    def __init__(self, base, bits=256, w=8):
+        self.w, self.mask = w, (1 << w) - 1
+        self.rows = []
+        b = base
+        for _ in range((bits + w - 1) // w):
+            row = [1] * (1 << w)
+            for d in range(1, 1 << w):
+                row[d] = row[d - 1] * b % P
+            self.rows.append(row)
+            b = row[-1] * b % P
+
+    def pow(self, e):
+        r, w, mask = 1, self.w, self.mask
+        for row in self.rows:
+            if not e:
+                break
+            d = e & mask
+            if d:
+                r = r * row[d] % P
+            e >>= w
+        return r
+
+G_TABLE = FixedBase(G)
+
+def _int(*parts):
+    return int.from_bytes(hashlib.sha256(b"".join(parts)).digest(), "big")
+
+def keygen():
+    x = secrets.randbelow(Q - 1) + 1
+    return x, G_TABLE.pow(x)
+
+def challenge(R, X, msg):
+    return _int(R.to_bytes(32, "big"), X.to_bytes(32, "big"), msg) % Q
+
+def sign(x, X, msg):
+    # deterministic nonce (no RNG at signing time, no nonce reuse across messages)
+    k = _int(x.to_bytes(32, "big"), msg) % Q or 1
+    R = G_TABLE.pow(k)
+    return R, (k + challenge(R, X, msg) * x) % Q
+
+def verify(X, msg, R, s):
+    # cofactored check g^s = +-R * X^e: R and P - R are the same element of the
+    # prime-order group Z_P^* / {+-1}, which is what makes batching sound
+    if not (0 < R < P and 0 <= s < Q):
+        return False
+    lhs = G_TABLE.pow(s)
+    rhs = R * pow(X, challenge(R, X, msg), P) % P
+    return lhs == rhs or lhs == P - rhs
+
+def multi_exp(bases, exps, bits=BATCH_COEFF_BITS):
+    # prod bases[i]^exps[i] mod P with the bucket (Pippenger) method:
+    # per c-bit window every base costs one multiplication
+    c = max(2, len(bases).bit_length() - 3)
+    mask = (1 << c) - 1
+    result = 1
+    for shift in range((bits - 1) // c * c, -1, -c):
+        for _ in range(c):
+            result = result * result % P
+        buckets = [1] * (mask + 1)
+        for b, e in zip(bases, exps):
+            d = (e >> shift) & mask
+            if d:
+                buckets[d] = buckets[d] * b % P
+        running = total = 1
+        for d in range(mask, 0, -1):        # prod_d buckets[d]^d
+            running = running * buckets[d] % P
+            total = total * running % P
+        result = result * total % P
+    return result
+
+def batch_verify(items):
+    # items: [(X, msg, R, s), ...]. Checks g^(sum a_i s_i) = prod R_i^a_i * prod X^(sum a_i e_i)
+    # (up to sign) for random a_i; public keys repeat, so their terms are merged per key
+    if not items:
+        return True
+    coeffs, Rs = [], []
+    S = 0
+    key_exp = {}
+    for X, msg, R, s in items:
+        if not (0 < R < P and 0 <= s < Q):
+            return False
+        a = secrets.randbits(BATCH_COEFF_BITS) | 1
+        coeffs.append(a)
+        Rs.append(R)
+        S += a * s
+        key_exp[X] = key_exp.get(X, 0) + a * challenge(R, X, msg)
+    rhs = multi_exp(Rs, coeffs)
+    for X, e in key_exp.items():
+        rhs = rhs * pow(X, e % Q, P) % P
+    lhs = G_TABLE.pow(S % Q)
+    return lhs * lhs % P == rhs * rhs % P
+
+# ------------------------------------------
+# Blocks and the chain
+# ------------------------------------------
+# vote: None, ("add", validator_id, public_key) or ("remove", validator_id, None)
+Block = namedtuple("Block", "height parent root proposer vote R s")
+GENESIS = bytes(32)
+
+class InvalidBlock(ValueError):
+    pass
+
+def header_hash(block):
+    vote = "" if block.vote is None else ":".join(map(str, block.vote))
+    return hashlib.sha256(b"".join([block.height.to_bytes(8, "big"), block.parent, block.root,
+                                    f"{block.proposer}|{vote}".encode()])).digest()
+
+class PoAChain:
+    def __init__(self, validators, epoch_length=1000):
+        # validators: dict validator_id -> public key
+        self.keys = dict(validators)        # every key ever admitted (old blocks stay verifiable)
+        self.validators = sorted(validators)
+        self.epoch_length = epoch_length
+        self.epochs = [tuple(self.validators)]
+        self.tally = {}                     # vote -> set of validators that cast it this epoch
+        self.height = 0                     # height of the next block
+        self.head = GENESIS
+
+    def proposer(self, height):
+        vals = self.epochs[height // self.epoch_length]
+        return vals[height % len(vals)]
+
+    def propose(self, secret, payload, vote=None):
+        # build, sign and append the next block; secret belongs to self.proposer(self.height)
+        proposer = self.proposer(self.height)
+        block = Block(self.height, self.head, hashlib.sha256(payload).digest(), proposer, vote, 0, 0)
+        self._check_header(block)
+        h = header_hash(block)
+        R, s = sign(secret, self.keys[proposer], h)
+        block = block._replace(R=R, s=s)
+        self._apply(block, h)
+        return block
+
+    def import_block(self, block):
+        self._check_header(block)
+        h = header_hash(block)
+        if not verify(self.keys[block.proposer], h, block.R, block.s):
+            raise InvalidBlock(f"bad signature at height {block.height}")
+        self._apply(block, h)
+
+    def import_blocks(self, blocks, batch_size=4096):
+        # headers are checked (and votes applied) in order; the signatures of each
+        # batch are verified together. On any failure the batch is rolled back and
+        # replayed one by one, which imports the valid prefix and raises at the bad block.
+        for i in range(0, len(blocks), batch_size):
+            chunk = blocks[i:i + batch_size]
+            saved = self._snapshot()
+            items = []
+            try:
+                for block in chunk:
+                    self._check_header(block)
+                    h = header_hash(block)
+                    items.append((self.keys[block.proposer], h, block.R, block.s))
+                    self._apply(block, h)
+                ok = batch_verify(items)
+            except Exception:               # malformed blocks may fail before InvalidBlock
+                ok = False
+            if not ok:
+                self._restore(saved)
+                for block in chunk:
+                    self.import_block(block)
+        return self.height
+
+    def _check_header(self, block):
+        if block.height != self.height:
+            raise InvalidBlock(f"expected height {self.height}, got {block.height}")
+        if block.parent != self.head:
+            raise InvalidBlock(f"unknown parent at height {block.height}")
+        if block.proposer != self.proposer(block.height):
+            raise InvalidBlock(f"{block.proposer} is not the proposer of height {block.height}")
+        if block.vote is not None:
+            if not isinstance(block.vote, tuple) or len(block.vote) != 3:
+                raise InvalidBlock(f"malformed vote at height {block.height}")
+            kind, target, key = block.vote
+            if kind not in ("add", "remove"):
+                raise InvalidBlock(f"unknown vote {kind!r} at height {block.height}")
+            if not isinstance(target, str):
+                raise InvalidBlock(f"malformed vote target at height {block.height}")
+            member = target in self.epochs[-1]
+            if kind == "add" and (member or not isinstance(key, int) or not 1 < key < P
+                                  or pow(key, Q, P) != 1):
+                raise InvalidBlock(f"invalid add vote for {target} at height {block.height}")
+            if kind == "remove" and not member:
+                raise InvalidBlock(f"invalid remove vote for {target} at height {block.height}")
+
+    def _apply(self, block, h):
+        if block.vote is not None:
+            kind, target, key = block.vote
+            vote = (kind, target, key if kind == "add" else None)   # one bucket per removal
+            self.tally.setdefault(vote, set()).add(block.proposer)
+        self.head = h
+        self.height += 1
+        if self.height % self.epoch_length == 0:
+            self._new_epoch()
+
+    def _new_epoch(self):
+        members = set(self.validators)
+        quorum = len(self.validators) // 2 + 1
+        for (kind, target, key), voters in self.tally.items():
+            if len(voters) < quorum:
+                continue
+            if kind == "add":
+                members.add(target)
+                self.keys[target] = key
+            else:
+                members.discard(target)
+        if members:                         # never let the set run empty
+            self.validators = sorted(members)
+        self.tally = {}
+        self.epochs.append(tuple(self.validators))
+
+    def _snapshot(self):
+        return (self.height, self.head, self.validators, len(self.epochs), dict(self.keys),
+                {vote: set(voters) for vote, voters in self.tally.items()})
+
+    def _restore(self, saved):
+        self.height, self.head, self.validators, n_epochs, self.keys, self.tally = saved
+        del self.epochs[n_epochs:]
+
+# ------------------------------------------
+# Chain generation and import benchmark
+# ------------------------------------------
+def produce(chain, secrets_by_id, n, chunk=10000):
+    # yields lists of freshly signed blocks. Each epoch the validators first vote
+    # in a new validator, then vote out the first member in sorted order.
+    new_keys = {}
+    made = 0
+    while made < n:
+        blocks = []
+        for _ in range(min(chunk, n - made)):
+            h = chain.height
+            offset = h % chain.epoch_length
+            size = len(chain.validators)
+            vote = None
+            epoch = h // chain.epoch_length
+            if offset < size:
+                vid = f"N{epoch}"
+                if vid not in new_keys:
+                    new_keys[vid] = keygen()
+                    secrets_by_id[vid] = new_keys[vid][0]
+                vote = ("add", vid, new_keys[vid][1])
+            elif offset < 2 * size and epoch > 0:
+                vote = ("remove", chain.validators[0], None)
+            proposer = chain.proposer(h)
+            blocks.append(chain.propose(secrets_by_id[proposer], f"block {h}".encode(), vote))
+        made += len(blocks)
+        yield blocks
+
+def benchmark(n_blocks, n_validators=21, epoch_length=30000, single_blocks=5000, batch_size=4096):
+    keys = {f"V{i:02d}": keygen() for i in range(n_validators)}
+    secrets_by_id = {v: x for v, (x, _) in keys.items()}
+    genesis = {v: X for v, (_, X) in keys.items()}
+    producer = PoAChain(genesis, epoch_length)
+    batched = PoAChain(genesis, epoch_length)
+    single = PoAChain(genesis, epoch_length)
+    t_gen = t_batch = t_single = 0.0
+
+    start = time.perf_counter()
+    for blocks in produce(producer, secrets_by_id, n_blocks):
+        now = time.perf_counter()
+        t_gen += now - start
+        batched.import_blocks(blocks, batch_size)
+        t_batch += time.perf_counter() - now
+        if single.height < single_blocks:
+            now = time.perf_counter()
+            for block in blocks[:single_blocks - single.height]:
+                single.import_block(block)
+            t_single += time.perf_counter() - now
+        start = time.perf_counter()
+        if batched.height % 100000 == 0:
+            print(f"  {batched.height:>9,} blocks imported, epoch {len(batched.epochs) - 1}, "
+                  f"{len(batched.validators)} validators")
+    assert batched.head == producer.head and batched.validators == producer.validators
+
+    print(f"\n{n_blocks:,} blocks, {len(producer.epochs)} epochs, "
+          f"final validator set: {', '.join(producer.validators)}")
+    print(f"{'produce + sign':>24}: {n_blocks / t_gen:>9,.0f} blocks/s ({t_gen:.1f}s)")
+    print(f"{'import, one by one':>24}: {single.height / t_single:>9,.0f} blocks/s "
+          f"(first {single.height:,} blocks)")
+    print(f"{f'import, batch {batch_size}':>24}: {n_blocks / t_batch:>9,.0f} blocks/s ({t_batch:.1f}s)")
+
+def tamper_check():
+    keys = {f"V{i}": keygen() for i in range(4)}
+    genesis = {v: X for v, (_, X) in keys.items()}
+    producer = PoAChain(genesis, epoch_length=50)
+    blocks = [b for chunk in produce(producer, {v: x for v, (x, _) in keys.items()}, 300)
+              for b in chunk]
+    bad = list(blocks)
+    bad[123] = bad[123]._replace(s=(bad[123].s + 1) % Q)
+    chain = PoAChain(genesis, epoch_length=50)
+    try:
+        chain.import_blocks(bad, batch_size=64)
+    except InvalidBlock as e:
+        print(f" tampered block rejected: {e}; chain stopped at height {chain.height}")
+    assert chain.height == 123
+    # a malformed vote is rejected as InvalidBlock and the batch rolled back as well
+    bad = list(blocks)
+    bad[77] = bad[77]._replace(vote=("add", "V9"))
+    chain = PoAChain(genesis, epoch_length=50)
+    try:
+        chain.import_blocks(bad, batch_size=64)
+    except InvalidBlock as e:
+        print(f" malformed block rejected: {e}; chain stopped at height {chain.height}")
+    assert chain.height == 77
+    chain = PoAChain(genesis, epoch_length=50)
+    chain.import_blocks(blocks, batch_size=64)
+    assert chain.head == producer.head
+    print(f" 300 honest blocks imported in batches of 64, validators now {chain.validators}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=1000000)
+    parser.add_argument("--validators", type=int, default=21)
+    parser.add_argument("--epoch", type=int, default=30000)
+    parser.add_argument("--batch", type=int, default=4096)
+    args = parser.parse_args()
+
+    tamper_check()
+    print(f"\nSyncing {args.blocks:,} PoA blocks ({args.validators} validators, epoch {args.epoch})")
+    benchmark(args.blocks, args.validators, args.epoch, batch_size=args.batch)
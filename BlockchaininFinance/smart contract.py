@@ -1,63 +1,429 @@
 # Minimal smart contract example (Python-side simulation)
 # - Demonstrates deploying a contract, calling methods, and contract state
 # - Simple ERC20-like token contract and an escrow contract example
+# - ContractRuntime: contract state lives in journaled storage. Every write is
+#   logged (old, new) before it is applied, an exception reverts the call
+#   (nested calls revert only their own part), events go to an indexed log,
+#   and checkpoints allow rollback and replay of the journal
+# - Batch entry points (batch_transfer, EscrowContract.settle) net the balance
+#   deltas, validate them all before writing, touch each account once and log
+#   one summary event per batch
 #
-# Run: python3 smart_contract_example.py
+# Run: python3 smart_contract_example.py [--bench [N]]
 
+import argparse
+import functools
+import random
 import time
+from collections import defaultdict, namedtuple
+
+MISSING = object()      # journal marker: key did not exist
+
+# Events (fields listed in INDEXED can be queried without scanning the log)
+Transfer = namedtuple("Transfer", "frm to amount")
+EscrowCreated = namedtuple("EscrowCreated", "escrow_id payer payee amount")
+EscrowReleased = namedtuple("EscrowReleased", "escrow_id payee amount")
+BatchTransfer = namedtuple("BatchTransfer", "transfers accounts total")
+EscrowsSettled = namedtuple("EscrowsSettled", "escrows payees total skipped")
+INDEXED = {
+    Transfer: ("frm", "to"),
+    EscrowCreated: ("escrow_id", "payer", "payee"),
+    EscrowReleased: ("escrow_id", "payee"),
+}
+
+Checkpoint = namedtuple("Checkpoint", "journal_pos events_pos state")
+
+class Storage(dict):
+    # A contract's persistent mapping. Writes are appended to the runtime's
+    # journal as (storage, key, old, new) before they are applied.
+    def __init__(self, runtime, name):
+        super().__init__()
+        self.runtime = runtime
+        self.name = name
+
+    def __setitem__(self, key, value):
+        self.runtime.journal.append((self, key, self.get(key, MISSING), value))
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.runtime.journal.append((self, key, self[key], MISSING))
+        dict.__delitem__(self, key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+class EventLog:
+    # Append-only event list with per-(event, field, value) indexes
+    def __init__(self):
+        self.entries = []               # (contract name, event)
+        self.index = defaultdict(list)  # event type or (type, field, value) -> positions
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, contract, event):
+        pos = len(self.entries)
+        self.entries.append((contract, event))
+        kind = type(event)
+        self.index[kind].append(pos)
+        for field in INDEXED.get(kind, ()):
+            self.index[(kind, field, getattr(event, field))].append(pos)
+
+    def truncate(self, n):
+        # drop events from position n on (their index entries are the newest ones)
+        while len(self.entries) > n:
+            _, event = self.entries.pop()
+            kind = type(event)
+            for key in [kind] + [(kind, f, getattr(event, f)) for f in INDEXED.get(kind, ())]:
+                positions = self.index[key]
+                positions.pop()
+                if not positions:
+                    del self.index[key]
+
+    def query(self, kind, **where):
+        # events of one type matching field == value, via the smallest index list
+        lists = [self.index.get((kind, f, v), []) for f, v in where.items()
+                 if f in INDEXED.get(kind, ())]
+        candidates = min(lists, key=len) if lists else self.index.get(kind, [])
+        return [self.entries[i][1] for i in candidates
+                if all(getattr(self.entries[i][1], f) == v for f, v in where.items())]
+
+class ContractRuntime:
+    def __init__(self, verbose=True):
+        self.stores = {}
+        self.journal = []               # write-ahead journal of committed writes
+        self.events = EventLog()
+        self.checkpoints = []
+        self.depth = 0                  # call nesting
+        self.calls = 0                  # committed top-level calls
+        self.reverts = 0
+        self.verbose = verbose
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def storage(self, name):
+        store = self.stores[name] = Storage(self, name)
+        return store
+
+    def emit(self, contract, event):
+        self.events.append(contract, event)
+
+    def call(self, fn, *args, **kwargs):
+        # Atomic call: on an exception every journaled write and event since the
+        # call started is undone, then the exception propagates to the caller
+        mark, events_mark = len(self.journal), len(self.events)
+        self.depth += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self._revert(mark, events_mark)
+            raise
+        finally:
+            self.depth -= 1
+        if self.depth == 0:
+            self.calls += 1
+        return result
+
+    def _revert(self, mark, events_mark):
+        journal = self.journal
+        while len(journal) > mark:
+            store, key, old, _ = journal.pop()
+            if old is MISSING:
+                dict.pop(store, key, None)
+            else:
+                dict.__setitem__(store, key, old)
+        self.events.truncate(events_mark)
+        self.reverts += 1
+
+    def checkpoint(self):
+        # full copy of the state plus the journal / event positions it corresponds to
+        assert self.depth == 0, "checkpoint inside a call"
+        cp = Checkpoint(len(self.journal), len(self.events),
+                        {name: dict(store) for name, store in self.stores.items()})
+        self.checkpoints.append(cp)
+        return cp
+
+    def rollback(self, cp):
+        # restore the state of a checkpoint and forget everything after it
+        assert self.depth == 0, "rollback inside a call"
+        for name, store in self.stores.items():
+            dict.clear(store)
+            dict.update(store, cp.state.get(name, {}))
+        del self.journal[cp.journal_pos:]
+        self.events.truncate(cp.events_pos)
+        self.checkpoints = [c for c in self.checkpoints if c.journal_pos <= cp.journal_pos]
+
+    def replay(self, cp, upto=None):
+        # rebuild the state from a checkpoint by re-applying the journal
+        state = {name: dict(values) for name, values in cp.state.items()}
+        for store, key, _, new in self.journal[cp.journal_pos:upto]:
+            target = state.setdefault(store.name, {})
+            if new is MISSING:
+                target.pop(key, None)
+            else:
+                target[key] = new
+        return state
+
+    def state(self):
+        return {name: dict(store) for name, store in self.stores.items()}
+
+def external(method):
+    # contract entry point: runs as one atomic call of the contract's runtime
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        return self.runtime.call(method, self, *args, **kwargs)
+    return call
 
 class SimpleTokenContract:
-    def __init__(self, name, symbol, owner):
+    def __init__(self, name, symbol, owner, runtime=None):
+        self.runtime = runtime or ContractRuntime()
         self.name = name
         self.symbol = symbol
         self.owner = owner
-        self.balances = {}
-        self.total_supply = 0
+        self.balances = self.runtime.storage(f"{symbol}.balances")
+        self.meta = self.runtime.storage(f"{symbol}.meta")
+        self.meta["total_supply"] = 0
+
+    @property
+    def total_supply(self):
+        return self.meta["total_supply"]
 
+    @external
     def mint(self, to, amount, caller):
         if caller != self.owner:
             raise PermissionError("only owner can mint")
         self.balances[to] = self.balances.get(to, 0) + amount
-        self.total_supply += amount
-        print(f"Minted {amount} {self.symbol} to {to}")
+        self.meta["total_supply"] += amount
+        self.runtime.emit(self.symbol, Transfer(None, to, amount))
+        self.runtime.log(f"Minted {amount} {self.symbol} to {to}")
 
+    @external
     def transfer(self, frm, to, amount):
         if self.balances.get(frm, 0) < amount:
             raise ValueError("insufficient balance")
         self.balances[frm] -= amount
         self.balances[to] = self.balances.get(to, 0) + amount
-        print(f"Transferred {amount} {self.symbol} from {frm} to {to}")
+        self.runtime.emit(self.symbol, Transfer(frm, to, amount))
+        self.runtime.log(f"Transferred {amount} {self.symbol} from {frm} to {to}")
+
+    @external
+    def batch_transfer(self, transfers):
+        # transfers: (frm, to, amount) triples, settled net: deltas are summed per
+        # account and checked against the balances before anything is written, so
+        # an account may spend what it receives in the same batch
+        delta = defaultdict(int)
+        count = total = 0
+        for frm, to, amount in transfers:
+            if amount < 0:
+                raise ValueError("negative amount")
+            delta[frm] -= amount
+            delta[to] += amount
+            count += 1
+            total += amount
+        balances = self.balances
+        short = [a for a, d in delta.items() if d < 0 and balances.get(a, 0) + d < 0]
+        if short:
+            raise ValueError(f"insufficient balance for {len(short)} accounts (first: {short[0]})")
+        for account, d in delta.items():
+            if d:
+                balances[account] = balances.get(account, 0) + d
+        self.runtime.emit(self.symbol, BatchTransfer(count, len(delta), total))
+        self.runtime.log(f"Batch of {count} transfers ({total} {self.symbol}) over {len(delta)} accounts")
+        return count
+
+Escrow = namedtuple("Escrow", "payer payee amount released")
 
 class EscrowContract:
     def __init__(self, token_contract):
         self.token = token_contract
-        self.escrows = {}  # escrow_id -> dict(state)
+        self.runtime = token_contract.runtime
+        self.escrows = self.runtime.storage("escrow.escrows")  # escrow_id -> Escrow
 
+    @external
     def create_escrow(self, escrow_id, payer, payee, amount):
         # payer must have approved/transfered token to this contract in a real chain
-        self.escrows[escrow_id] = {
-            "payer": payer,
-            "payee": payee,
-            "amount": amount,
-            "released": False
-        }
-        print(f"Escrow {escrow_id} created: {payer} -> {payee} amount {amount}")
+        self.escrows[escrow_id] = Escrow(payer, payee, amount, False)
+        self.runtime.emit("escrow", EscrowCreated(escrow_id, payer, payee, amount))
+        self.runtime.log(f"Escrow {escrow_id} created: {payer} -> {payee} amount {amount}")
 
+    @external
     def release(self, escrow_id, caller):
         e = self.escrows.get(escrow_id)
         if not e:
             raise KeyError("escrow not found")
-        if e["released"]:
-            print("already released")
+        if e.released:
+            self.runtime.log("already released")
             return
-        if caller != e["payer"]:
+        if caller != e.payer:
             raise PermissionError("only payer can release in this demo")
-        # Simulate token transfer from contract (we assume contract balance sufficient)
-        self.token.transfer("contract", e["payee"], e["amount"])
-        e["released"] = True
-        print(f"Escrow {escrow_id} released to {e['payee']}")
+        # Token transfer from the contract wallet; if it fails the whole release reverts
+        self.token.transfer("contract", e.payee, e.amount)
+        self.escrows[escrow_id] = e._replace(released=True)
+        self.runtime.emit("escrow", EscrowReleased(escrow_id, e.payee, e.amount))
+        self.runtime.log(f"Escrow {escrow_id} released to {e.payee}")
+
+    @external
+    def settle(self, releases):
+        # Bulk release. releases: (escrow_id, caller) pairs, each signed off by the
+        # escrow's payer. All of them are checked before any state changes; payouts
+        # are summed per payee and paid with one batch transfer. Escrows that are
+        # already released (or repeated in the batch) are skipped, as in release()
+        escrows = self.escrows
+        settled = {}
+        payouts = defaultdict(int)
+        skipped = 0
+        for escrow_id, caller in releases:
+            e = escrows.get(escrow_id)
+            if e is None:
+                raise KeyError(f"escrow not found: {escrow_id}")
+            if e.released or escrow_id in settled:
+                skipped += 1
+                continue
+            if caller != e.payer:
+                raise PermissionError(f"only payer can release {escrow_id}")
+            settled[escrow_id] = e
+            payouts[e.payee] += e.amount
+        self.token.batch_transfer([("contract", payee, amount) for payee, amount in payouts.items()])
+        for escrow_id, e in settled.items():
+            escrows[escrow_id] = Escrow(e.payer, e.payee, e.amount, True)
+        total = sum(payouts.values())
+        self.runtime.emit("escrow", EscrowsSettled(len(settled), len(payouts), total, skipped))
+        self.runtime.log(f"Settled {len(settled)} escrows ({total} to {len(payouts)} payees, "
+                         f"{skipped} skipped)")
+        return len(settled)
+
+def benchmark_runtime(n=1000000, accounts=10000, checkpoint_every=100000, seed=0):
+    # calls/s for n token transfers through the journaled runtime, against the
+    # same logic on a plain dict; some transfers overspend and revert
+    rng = random.Random(seed)
+    names = [f"acct{i}" for i in range(accounts)]
+    work = [(rng.choice(names), rng.choice(names), rng.randint(1, 150)) for _ in range(n)]
+
+    plain = {a: 1000 for a in names}
+    start = time.perf_counter()
+    failed = 0
+    for frm, to, amount in work:
+        if plain.get(frm, 0) < amount:
+            failed += 1
+            continue
+        plain[frm] -= amount
+        plain[to] = plain.get(to, 0) + amount
+    t_plain = time.perf_counter() - start
+
+    rt = ContractRuntime(verbose=False)
+    token = SimpleTokenContract("BenchToken", "BT", owner="bank", runtime=rt)
+    for a in names:
+        token.mint(a, 1000, caller="bank")
+    first = rt.checkpoint()
+    start = time.perf_counter()
+    for i, (frm, to, amount) in enumerate(work, 1):
+        try:
+            token.transfer(frm, to, amount)
+        except ValueError:
+            pass
+        if i % checkpoint_every == 0:
+            rt.checkpoint()
+    t_rt = time.perf_counter() - start
+    assert dict(token.balances) == plain and rt.reverts == failed
+    print(f" plain dict:        {n / t_plain:>10,.0f} transfers/s")
+    print(f" journaled runtime: {n / t_rt:>10,.0f} calls/s ({failed:,} reverted, "
+          f"{len(rt.journal):,} journal entries, {len(rt.events):,} events, "
+          f"{len(rt.checkpoints)} checkpoints)")
+
+    start = time.perf_counter()
+    state = rt.replay(first)
+    t_replay = time.perf_counter() - start
+    assert state == rt.state()
+    print(f" replay from the first checkpoint: {len(rt.journal) - first.journal_pos:,} writes "
+          f"in {t_replay:.2f}s")
+    start = time.perf_counter()
+    received = rt.events.query(Transfer, to=names[0])
+    t_query = time.perf_counter() - start
+    print(f" indexed query Transfer(to={names[0]}): {len(received)} events in {1000 * t_query:.2f} ms")
+    start = time.perf_counter()
+    rt.rollback(rt.checkpoints[len(rt.checkpoints) // 2])
+    print(f" rollback to the middle checkpoint in {time.perf_counter() - start:.2f}s, "
+          f"{len(rt.events):,} events kept")
+
+def benchmark_settlement(n=100000, payers=1000, payees=5000, seed=0):
+    # one call per transfer / release against the batch entry points, from the same checkpoint
+    rng = random.Random(seed)
+    rt = ContractRuntime(verbose=False)
+    token = SimpleTokenContract("BenchToken", "BT", owner="bank", runtime=rt)
+    escrow = EscrowContract(token)
+    payer_names = [f"payer{i}" for i in range(payers)]
+    for p in payer_names:
+        token.mint(p, 10 ** 9, caller="bank")
+    deals = [(f"esc{i}", rng.choice(payer_names), f"payee{rng.randrange(payees)}",
+              rng.randint(1, 10000)) for i in range(n)]
+    funding = [(payer, "contract", amount) for _, payer, _, amount in deals]
+    releases = [(escrow_id, payer) for escrow_id, payer, _, _ in deals]
+
+    def timed(fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    def fund_loop():
+        for frm, to, amount in funding:
+            token.transfer(frm, to, amount)
+
+    cp = rt.checkpoint()
+    t_loop = timed(fund_loop)
+    funded = dict(token.balances)
+    rt.rollback(cp)
+    t_batch = timed(lambda: token.batch_transfer(funding))
+    assert dict(token.balances) == funded
+    print(f" fund {n:,} escrows:  transfer() {t_loop:6.2f}s  batch_transfer() {t_batch:6.2f}s")
+
+    for escrow_id, payer, payee, amount in deals:
+        escrow.create_escrow(escrow_id, payer, payee, amount)
+    cp = rt.checkpoint()
+    events = len(rt.events)
+
+    def release_loop():
+        for escrow_id, caller in releases:
+            escrow.release(escrow_id, caller)
+
+    t_loop = timed(release_loop)
+    released = rt.state()
+    rt.rollback(cp)
+    t_batch = timed(lambda: escrow.settle(releases))
+    assert rt.state() == released and token.balances["contract"] == 0
+    print(f" clear {n:,} escrows: release()  {t_loop:6.2f}s  settle()         {t_batch:6.2f}s "
+          f"({len(rt.events) - events} events instead of {2 * n:,})")
+
+    # one bad instruction rejects the whole batch before anything is written
+    rt.rollback(cp)
+    try:
+        escrow.settle(releases[:-1] + [(releases[-1][0], "mallory")])
+    except PermissionError:
+        pass
+    assert rt.state() == cp.state and len(rt.events) == events
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", type=int, nargs="?", const=1000000, default=0,
+                        help="also benchmark N transfers through the runtime (default 1M)")
+    args = parser.parse_args()
+
     # Demo: deploy token, mint to Alice, create escrow for Bob
     token = SimpleTokenContract("DemoToken", "DMT", owner="Alice")
     token.mint("Alice", 1000, caller="Alice")
@@ -68,6 +434,37 @@ if __name__ == "__main__":
     # Alice funds escrow by transferring to contract
     token.transfer("Alice", "contract", 200)
     escrow.create_escrow("escrow1", payer="Alice", payee="Bob", amount=200)
+    checkpoint = token.runtime.checkpoint()
     # Later Alice releases funds to Bob
     escrow.release("escrow1", caller="Alice")
-    print("Token balances:", token.balances)
+    print("Token balances:", dict(token.balances))
+
+    # A release the contract cannot fund reverts as a whole: the nested transfer
+    # fails, so the escrow stays unreleased and no event is logged
+    escrow.create_escrow("escrow2", payer="Alice", payee="Carol", amount=500)
+    try:
+        escrow.release("escrow2", caller="Alice")
+    except ValueError as e:
+        print("Release reverted:", e, "| escrow2 released:", escrow.escrows["escrow2"].released)
+    print("Transfers to Bob:", token.runtime.events.query(Transfer, to="Bob"))
+    print("Escrow events:", [type(ev).__name__ for _, ev in token.runtime.events.entries
+                             if type(ev) in (EscrowCreated, EscrowReleased)])
+
+    # Replay the journal from the checkpoint, then roll back to it
+    assert token.runtime.replay(checkpoint) == token.runtime.state()
+    token.runtime.rollback(checkpoint)
+    print("Balances after rollback to the checkpoint:", dict(token.balances))
+
+    # Batch APIs: fund two escrows in one net transfer, then clear both at once
+    token.batch_transfer([("Alice", "contract", 100), ("Alice", "contract", 50)])
+    escrow.create_escrow("escrow3", payer="Alice", payee="Bob", amount=100)
+    escrow.create_escrow("escrow4", payer="Alice", payee="Carol", amount=50)
+    escrow.settle([("escrow1", "Alice"), ("escrow3", "Alice"), ("escrow4", "Alice")])
+    print("Token balances after settlement:", dict(token.balances))
+    print("Summary events:", token.runtime.events.query(EscrowsSettled))
+
+    if args.bench:
+        print(f"\nRuntime benchmark ({args.bench:,} transfers)")
+        benchmark_runtime(args.bench)
+        print("\nBatch settlement benchmark")
+        benchmark_settlement()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Leading-Zero Statistics Scanner
+
+Hashes millions of nonces (block_data + str(nonce), as in "Nonce & Target Value")
+and compares the empirical distribution of leading zero BITS of SHA-256 with
+the theoretical geometric law P(at least k zero bits) = 2^-k.
+
+- Nonces are processed in fixed-size batches; each batch only keeps a
+  65-bin histogram, so memory stays bounded however many nonces are scanned.
+- Leading zeros are counted from the raw digests with NumPy (no hex strings).
+- Batches are spread across a process pool and their histograms summed.
+
+Run:
+  python leading_zero_scanner.py --nonces 2000000 --workers 4
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# ------------------------------------------
+# Leading zero bits of many digests at once
+# ------------------------------------------
+def leading_zero_bits(top64):
+    # top64: uint64 array holding the first 8 bytes of each digest (big-endian).
+    # Binary-search count-leading-zeros: test the top 32, 16, ..., 1 bits.
+    x = top64.copy()
+    lz = np.zeros(len(x), dtype=np.int64)
+    for s in (32, 16, 8, 4, 2, 1):
+        top_clear = (x >> np.uint64(64 - s)) == 0
+        lz += top_clear * s
+        x = np.where(top_clear, x << np.uint64(s), x)
+    # 64+ zero bits (probability 2^-64) are reported as 64
+    return np.where(top64 == 0, 64, lz)
+
+def scan_batch(block_data, start, stop):
+    # histogram[k] = number of nonces in [start, stop) whose hash has exactly k leading zero bits
+    midstate = hashlib.sha256(block_data.encode())
+    digests = bytearray()
+    for nonce in range(start, stop):
+        h = midstate.copy()
+        h.update(str(nonce).encode())
+        digests += h.digest()
+    top64 = np.frombuffer(bytes(digests), dtype='>u8').reshape(-1, 4)[:, 0].astype(np.uint64)
+    return np.bincount(leading_zero_bits(top64), minlength=65)
+
+# ------------------------------------------
+# Streaming histogram over all batches
+# ------------------------------------------
+def scan(block_data, nonces, batch=100_000, workers=None):
+    workers = workers or os.cpu_count() or 1
+    ranges = [(block_data, s, min(s + batch, nonces)) for s in range(0, nonces, batch)]
+    hist = np.zeros(65, dtype=np.int64)
+    if workers == 1:
+        for args in ranges:
+            hist += scan_batch(*args)
+        return hist
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in order as batches finish; only histograms are kept
+        for h in pool.map(scan_batch, *zip(*ranges)):
+            hist += h
+    return hist
+
+def report(hist):
+    n = hist.sum()
+    if n == 0:
+        print("no hashes scanned")
+        return
+    at_least = hist[::-1].cumsum()[::-1]          # at_least[k] = #hashes with >= k zero bits
+    print(f"{'k':>3} {'exactly k':>11} {'>= k':>11} {'empirical':>11} {'2^-k':>11} {'ratio':>7}")
+    for k in range(0, 65):
+        if at_least[k] == 0:
+            break
+        emp = at_least[k] / n
+        theo = 2.0 ** -k
+        print(f"{k:>3} {hist[k]:>11} {at_least[k]:>11} {emp:>11.3e} {theo:>11.3e} {emp / theo:>7.3f}")
+    # mean of a geometric(1/2) count of leading zeros is 1
+    mean = (np.arange(65) * hist).sum() / n
+    print(f"\nmean leading zero bits: {mean:.4f} (theory: 1.0), max seen: {np.nonzero(hist)[0].max()}")
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="Alice pays Bob 5 BTC")
+    parser.add_argument("--nonces", type=positive_int, default=1_000_000)
+    parser.add_argument("--batch", type=positive_int, default=100_000)
+    parser.add_argument("--workers", type=positive_int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    hist = scan(args.data, args.nonces, args.batch, args.workers)
+    elapsed = time.perf_counter() - start
+    rate = f"{args.nonces / elapsed:,.0f} H/s" if elapsed > 0 else "too fast to time"
+    print(f"Scanned {args.nonces:,} nonces in {elapsed:.2f}s ({rate})\n")
+    report(hist)
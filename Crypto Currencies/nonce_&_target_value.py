@@ -60,4 +60,50 @@ for nonce in range(10_000):
 
     # 3 leading zeros (rare but possible)
     if h.startswith("000"):
-        print(f"[3 zeros] Nonce: {nonce:5d} | Hash: {h}  <-- RARE")
\ No newline at end of file
+        print(f"[3 zeros] Nonce: {nonce:5d} | Hash: {h}  <-- RARE")
+
+# ------------------------------------------
+# Midstate caching: hash the constant prefix only once
+# ------------------------------------------
+# SHA-256 consumes its input in 64-byte blocks. Every nonce attempt above
+# re-hashes block_data from scratch, although only the nonce changes.
+# hashlib objects can be copied: absorb the constant prefix once, then for
+# each attempt copy that state ("midstate") and feed only the nonce digits.
+# The saving grows with the prefix: all of its complete 64-byte blocks are
+# compressed exactly once instead of once per nonce.
+
+import time
+
+def mine_naive(block_data, target_prefix, max_tries):
+    for nonce in range(max_tries):
+        block_hash = hashlib.sha256((block_data + str(nonce)).encode()).hexdigest()
+        if block_hash.startswith(target_prefix):
+            return nonce, block_hash
+    return None, None
+
+def mine_midstate(block_data, target_prefix, max_tries):
+    midstate = hashlib.sha256(block_data.encode())     # constant prefix, hashed once
+    for nonce in range(max_tries):
+        h = midstate.copy()
+        h.update(str(nonce).encode())                  # only the varying suffix
+        block_hash = h.hexdigest()
+        if block_hash.startswith(target_prefix):
+            return nonce, block_hash
+    return None, None
+
+def hash_rate(miner, block_data, tries=200_000):
+    # hashes per second over a fixed number of attempts (unreachable target)
+    start = time.perf_counter()
+    miner(block_data, "x", tries)
+    return tries / (time.perf_counter() - start)
+
+print("\nMidstate caching vs. naive loop")
+assert mine_midstate(block_data, "0000", 200_000) == mine_naive(block_data, "0000", 200_000)
+
+# short demo header vs. a header carrying ~1 KB of transactions
+long_block_data = "|".join(f"tx{i}: Alice pays Bob {i} BTC" for i in range(40))
+for label, data in (("demo header", block_data), ("1 KB header", long_block_data)):
+    naive = hash_rate(mine_naive, data)
+    cached = hash_rate(mine_midstate, data)
+    print(f"{label:12s} ({len(data):5d} bytes): naive {naive:>10,.0f} H/s | "
+          f"midstate {cached:>10,.0f} H/s | speed-up {cached / naive:.1f}x")
@@ -1,3 +1,4 @@
+# SHA-256 digest of "Blockchain" (see sha256_algorithm.py) as a 256-bit binary string
 binary =    '01100010010111011010010001001110' \
             '01001110101011110101100011010110' \
             '00011100111100000100100011010001' \
@@ -6,5 +7,10 @@ binary =    '01100010010111011010010001001110' \
             '01101101100010111011010101001110' \
             '11000000011011000011000011011110' \
             '00000111110110110101011111100001'
-hex = format(int(binary, 2), 'x')
-print(hex)
\ No newline at end of file
+
+def binary_to_hex(bits):
+    # 4 bits per hex digit; keep leading zeros
+    return format(int(bits, 2), '0{}x'.format(len(bits) // 4))
+
+if __name__ == '__main__':
+    print(binary_to_hex(binary))
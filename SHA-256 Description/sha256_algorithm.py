@@ -1,4 +1,5 @@
-import math
+import struct
+from collections import namedtuple
 
 # --- SHA-256 Constants and Initial Hash Values (H) ---
 # Initial hash values (h0 to h7), computed from the fractional parts 
@@ -59,101 +60,214 @@ def sigma1(w):
 
 # --- Pre-processing (Encoding and Padding) ---
 
+def padding(message_length):
+    # Padding for a message of `message_length` bytes:
+    # 2a: a single '1' bit (0x80 byte)
+    # 2b: k zero bits until the length is 448 mod 512 bits (56 mod 64 bytes)
+    # 2c: the 64-bit big-endian original length in bits
+    k = (55 - message_length) % 64
+    return b'\x80' + b'\x00' * k + struct.pack('>Q', message_length * 8)
+
 def preprocess_message(input_string):
-    # Step 1: Encode input into binary (UTF-8 standard)
-    # For 'Blockchain', this results in an 80-bit binary string.
-    
-    # Python's default bytes encoding for strings is often UTF-8, which covers ASCII.
-    # We convert to binary string representation of the bytes.
-    binary_message = ''.join(format(byte, '08b') for byte in input_string.encode('utf-8'))
-    
-    # Step 2: Padding 
-    original_length = len(binary_message)
-    
-    # 2a: Append a single '1' bit
-    binary_message += '1'
-    
-    # 2b: Append k zero bits
-    # The message must be a multiple of 512 bits.
-    # Pad until length is 448 mod 512 (which is 64 bits short of 512).
-    # Since we added '1', length is now original_length + 1.
-    k = (448 - (original_length + 1) % 512) % 512
-    binary_message += '0' * k
-    
-    # 2c: Append the 64-bit original length 
-    length_bits = format(original_length, '064b')
-    binary_message += length_bits
-    
-    # Step 2: Break padded message into 512-bit blocks
+    # Step 1: Encode input into bytes (UTF-8 standard)
+    # For 'Blockchain', this results in 10 bytes = 80 bits.
+    message = input_string.encode('utf-8') if isinstance(input_string, str) else bytes(input_string)
+
+    # Step 2: Padding (see padding() above)
+    padded = message + padding(len(message))
+
+    # Step 2: Break padded message into 512-bit (64-byte) blocks
     # For 'Blockchain', N=1 block
-    blocks = []
-    for i in range(0, len(binary_message), 512):
-        blocks.append(binary_message[i:i + 512])
-        
-    return blocks
+    return [padded[i:i + 64] for i in range(0, len(padded), 64)]
+
+# --- Round tracing (optional) ---
+
+# Events yielded by compress_steps() (and passed to the `trace` hook of compress()):
+# the message schedule of a block, the working variables after each round t,
+# and the intermediate hash values after the block
+ScheduleTrace = namedtuple('ScheduleTrace', 'W')
+RoundTrace = namedtuple('RoundTrace', 't K W T1 T2 a b c d e f g h')
+BlockTrace = namedtuple('BlockTrace', 'hash_vals')
 
 # --- Hashing (Main SHA-256 Loop) ---
 
+def compress(hash_vals, block, trace=None):
+    # Process one 512-bit (64-byte) block, updating hash_vals (h0..h7) in place.
+    # trace: optional callable receiving ScheduleTrace/RoundTrace/BlockTrace events
+    for event in compress_steps(hash_vals, block, trace is not None):
+        trace(event)
+
+def compress_steps(hash_vals, block, traced=True):
+    # The compression function as a generator: each event is yielded as soon as
+    # its round is done, and hash_vals holds the result once the generator is
+    # exhausted. With traced=False nothing is yielded and the only extra cost
+    # is one test per round.
+
+    # 1. Prepare the Message Schedule W (W0 to W63)
+    # W0 to W15: sixteen big-endian 32-bit "words" read straight from the bytes
+    W = list(struct.unpack('>16I', block))
+
+    # W16 to W63 iteratively calculated
+    for t in range(16, 64):
+        # Wt = sigma1(W[t-2]) + W[t-7] + sigma0(W[t-15]) + W[t-16] (mod 2^32)
+        W.append((sigma1(W[t-2]) + W[t-7] + sigma0(W[t-15]) + W[t-16]) & 0xFFFFFFFF)
+
+    if traced:
+        yield ScheduleTrace(tuple(W))
+
+    # 2. Initialize working variables a, b, c, d, e, f, g, h
+    a, b, c, d, e, f, g, h = hash_vals
+
+    # 3. Compression loop (64 rounds)
+    for t in range(64):
+        # T1 = h + Sigma1(e) + Ch(e, f, g) + Kt + Wt (mod 2^32)
+        T1 = (h + Sigma1(e) + Ch(e, f, g) + K[t] + W[t]) & 0xFFFFFFFF
+
+        # T2 = Sigma0(a) + Maj(a, b, c) (mod 2^32)
+        T2 = (Sigma0(a) + Maj(a, b, c)) & 0xFFFFFFFF
+
+        # Update working variables (shift operation)
+        h = g                                   # h = g
+        g = f                                   # g = f
+        f = e                                   # f = e
+        e = (d + T1) & 0xFFFFFFFF               # e = d + T1
+        d = c                                   # d = c
+        c = b                                   # c = b
+        b = a                                   # b = a
+        a = (T1 + T2) & 0xFFFFFFFF              # a = T1 + T2
+
+        if traced:
+            yield RoundTrace(t, K[t], W[t], T1, T2, a, b, c, d, e, f, g, h)
+
+    # 4. Add final values of working variables to hash values (h0 to h7) [cite: 831]
+    for i, v in enumerate((a, b, c, d, e, f, g, h)):
+        hash_vals[i] = (hash_vals[i] + v) & 0xFFFFFFFF
+
+    if traced:
+        yield BlockTrace(tuple(hash_vals))
+
 def sha256_hash(blocks):
-    # Initialize working hash values h0 to h7 to the initial constants H 
-    hash_vals = list(H) 
+    # Initialize working hash values h0 to h7 to the initial constants H
+    hash_vals = list(H)
 
-    # Process each 512-bit block 
+    # Process each 512-bit block
     for block in blocks:
-        # 1. Prepare the Message Schedule W (W0 to W63) 
-        W = []
-        # W0 to W15 (sixteen 32-bit "words") 
-        for i in range(0, 512, 32):
-            W.append(int(block[i:i + 32], 2))
-
-        # W16 to W63 iteratively calculated 
-        for t in range(16, 64):
-            # Wt = sigma1(W[t-2]) + W[t-7] + sigma0(W[t-15]) + W[t-16] (mod 2^32)
-            W.append((sigma1(W[t-2]) + W[t-7] + sigma0(W[t-15]) + W[t-16]) & 0xFFFFFFFF)
-
-        # 2. Initialize working variables a, b, c, d, e, f, g, h 
-        a, b, c, d, e, f, g, h = hash_vals
-
-        # 3. Compression loop (64 rounds) 
-        for t in range(64):
-            # T1 = h + Sigma1(e) + Ch(e, f, g) + Kt + Wt (mod 2^32) 
-            T1 = (h + Sigma1(e) + Ch(e, f, g) + K[t] + W[t]) & 0xFFFFFFFF
-            
-            # T2 = Sigma0(a) + Maj(a, b, c) (mod 2^32) 
-            T2 = (Sigma0(a) + Maj(a, b, c)) & 0xFFFFFFFF
-
-            # Update working variables (shift operation) 
-            h = g                                   # h = g
-            g = f                                   # g = f
-            f = e                                   # f = e
-            e = (d + T1) & 0xFFFFFFFF               # e = d + T1
-            d = c                                   # d = c
-            c = b                                   # c = b
-            b = a                                   # b = a
-            a = (T1 + T2) & 0xFFFFFFFF              # a = T1 + T2
-
-        # 4. Add final values of working variables to hash values (h0 to h7) [cite: 831]
-        hash_vals[0] = (hash_vals[0] + a) & 0xFFFFFFFF 
-        hash_vals[1] = (hash_vals[1] + b) & 0xFFFFFFFF
-        hash_vals[2] = (hash_vals[2] + c) & 0xFFFFFFFF
-        hash_vals[3] = (hash_vals[3] + d) & 0xFFFFFFFF
-        hash_vals[4] = (hash_vals[4] + e) & 0xFFFFFFFF
-        hash_vals[5] = (hash_vals[5] + f) & 0xFFFFFFFF
-        hash_vals[6] = (hash_vals[6] + g) & 0xFFFFFFFF
-        hash_vals[7] = (hash_vals[7] + h) & 0xFFFFFFFF
-        
+        compress(hash_vals, block)
+
     return hash_vals
 
+def message_blocks(message):
+    # The 64-byte blocks of the padded message, produced lazily. message is a str,
+    # bytes, or an iterable of byte chunks (e.g. a file read piece by piece); only
+    # the current block is held besides the input itself.
+    if isinstance(message, str):
+        message = message.encode('utf-8')
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        message = (message,)
+    buffer, length = b'', 0
+    for chunk in message:
+        chunk = memoryview(chunk).cast('B')
+        length += len(chunk)
+        if buffer:
+            need = 64 - len(buffer)
+            buffer += chunk[:need].tobytes()
+            chunk = chunk[need:]
+            if len(buffer) < 64:
+                continue
+            yield buffer
+            buffer = b''
+        full = len(chunk) - len(chunk) % 64
+        for i in range(0, full, 64):
+            yield chunk[i:i + 64].tobytes()
+        buffer = chunk[full:].tobytes()
+    tail = buffer + padding(length)
+    for i in range(0, len(tail), 64):
+        yield tail[i:i + 64]
+
+def sha256_trace(message):
+    # Step-by-step view of the same compression code used for hashing: yields
+    # (block_index, event) pairs live from inside the round loop. Blocks come
+    # from message_blocks(), so apart from the input nothing grows with the
+    # message length, and stopping early stops hashing mid-block.
+    hash_vals = list(H)
+    for i, block in enumerate(message_blocks(message)):
+        for event in compress_steps(hash_vals, block):
+            yield i, event
+
+# --- Streaming, hashlib-compatible object ---
+
+class SHA256:
+    # Same interface as hashlib.sha256(): update() / digest() / hexdigest() / copy().
+    # Full 64-byte blocks are compressed as soon as they arrive; only the
+    # incomplete tail (< 64 bytes) is buffered, so memory stays constant
+    # however much data is streamed through update().
+    name = 'sha256'
+    digest_size = 32
+    block_size = 64
+
+    def __init__(self, data=b''):
+        self._h = list(H)
+        self._buffer = b''
+        self._length = 0            # total message length in bytes
+        if data:
+            self.update(data)
+
+    def update(self, data):
+        if isinstance(data, str):
+            raise TypeError('Strings must be encoded before hashing')
+        data = memoryview(data).cast('B')
+        self._length += len(data)
+
+        if self._buffer:
+            need = 64 - len(self._buffer)
+            self._buffer += data[:need].tobytes()
+            data = data[need:]
+            if len(self._buffer) < 64:
+                return
+            compress(self._h, self._buffer)
+            self._buffer = b''
+
+        full = len(data) - len(data) % 64
+        for i in range(0, full, 64):
+            compress(self._h, data[i:i + 64])
+        self._buffer = data[full:].tobytes()
+
+    def digest(self):
+        # Pad a copy of the state so the object can keep being updated
+        hash_vals = list(self._h)
+        tail = self._buffer + padding(self._length)
+        for i in range(0, len(tail), 64):
+            compress(hash_vals, tail[i:i + 64])
+        return struct.pack('>8I', *hash_vals)
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+    def copy(self):
+        other = SHA256.__new__(SHA256)
+        other._h = list(self._h)
+        other._buffer = self._buffer
+        other._length = self._length
+        return other
+
+def sha256_file(path, chunk_size=1 << 16):
+    # Hash a file of any size chunk by chunk
+    h = SHA256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
 # --- Final Digest Generation ---
 
 def generate_digest(final_hash_values):
-    # Step 3: Append hash values h0..h7 to get final 256-bit digest 
-    # Return digest in hexadecimal format 
+    # Step 3: Append hash values h0..h7 to get final 256-bit digest
+    # Return digest in hexadecimal format
     digest_hex = ''
     for h_val in final_hash_values:
         # Format each 32-bit word as 8 hexadecimal characters
         digest_hex += format(h_val, '08x')
-        
+
     return digest_hex
 
 # --- Main Execution ---
@@ -164,8 +278,17 @@ def sha256(message):
     return generate_digest(final_hash_values)
 
 # --- Run for input "Blockchain" ---
-input = "Blockchain"
-digest = sha256(input)
+if __name__ == '__main__':
+    input = "Blockchain"
+    digest = sha256(input)
+
+    print(f"Input: {input}")
+    print(f"SHA-256 Digest: {digest}")
 
-print(f"Input: {input}")
-print(f"SHA-256 Digest: {digest}")
\ No newline at end of file
+    # Optional: python sha256_algorithm.py --trace  prints every round
+    import sys
+    if '--trace' in sys.argv:
+        for block_index, event in sha256_trace(input):
+            if isinstance(event, RoundTrace):
+                print(f"block {block_index} round {event.t:2d}: " +
+                      ' '.join(format(v, '08x') for v in event[5:]))
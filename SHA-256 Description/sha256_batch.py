@@ -0,0 +1,95 @@
+# Batch SHA-256: hash many short messages at once (block headers, nonces, ledger rows)
+# by running the 64-round compression over NumPy uint32 arrays, one message per lane.
+# Run: python sha256_batch.py  (checks against hashlib, then benchmarks msg/s vs batch size)
+
+import hashlib
+import os
+import time
+
+import numpy as np
+
+# The round functions from sha256_algorithm.py only use &, ^, ~, >>, << and
+# masking with 0xFFFFFFFF, so they work unchanged on NumPy uint32 arrays:
+# every array element is one independent message ("lane").
+from sha256_algorithm import H, K, Ch, Maj, Sigma0, Sigma1, sigma0, sigma1, padding, SHA256
+
+# --- Lane layout ---
+
+def pad_lanes(messages):
+    # Pad every message and group the ones with the same number of 64-byte blocks.
+    # Returns {n_blocks: (lane indices, uint32 word array of shape (lanes, n_blocks * 16))}
+    groups = {}
+    for i, m in enumerate(messages):
+        padded = m + padding(len(m))
+        groups.setdefault(len(padded) // 64, []).append((i, padded))
+
+    lanes = {}
+    for n_blocks, items in groups.items():
+        idx = np.array([i for i, _ in items])
+        raw = np.frombuffer(b''.join(p for _, p in items), dtype='>u4')
+        lanes[n_blocks] = (idx, raw.reshape(len(items), n_blocks * 16).astype(np.uint32))
+    return lanes
+
+# --- Compression over all lanes at once ---
+
+def compress_lanes(state, words):
+    # state: list of 8 uint32 arrays (h0..h7 of every lane), updated in place
+    # words: uint32 array (lanes, 16) = W0..W15 of the current block of every lane
+    W = [words[:, t] for t in range(16)]
+    for t in range(16, 64):
+        W.append(sigma1(W[t-2]) + W[t-7] + sigma0(W[t-15]) + W[t-16])
+
+    a, b, c, d, e, f, g, h = state
+    for t in range(64):
+        # uint32 arithmetic wraps, i.e. it is already mod 2^32
+        T1 = h + Sigma1(e) + Ch(e, f, g) + np.uint32(K[t]) + W[t]
+        T2 = Sigma0(a) + Maj(a, b, c)
+        h, g, f, e, d, c, b, a = g, f, e, d + T1, c, b, a, T1 + T2
+
+    for i, v in enumerate((a, b, c, d, e, f, g, h)):
+        state[i] = state[i] + v
+
+def sha256_batch(messages):
+    # SHA-256 of many byte strings at once; returns a list of 32-byte digests
+    digests = [None] * len(messages)
+    for n_blocks, (idx, words) in pad_lanes(messages).items():
+        state = [np.full(len(idx), v, dtype=np.uint32) for v in H]
+        for blk in range(n_blocks):
+            compress_lanes(state, words[:, blk * 16:(blk + 1) * 16])
+        out = np.stack(state, axis=1).astype('>u4')      # (lanes, 8) big-endian
+        for lane, i in enumerate(idx):
+            digests[i] = out[lane].tobytes()
+    return digests
+
+# --- Verification and benchmark ---
+
+def check_against_hashlib(n=2000):
+    messages = [os.urandom(length) for length in np.random.default_rng(0).integers(0, 300, n)]
+    messages += [b'', b'abc', b'Blockchain']
+    expected = [hashlib.sha256(m).digest() for m in messages]
+    assert sha256_batch(messages) == expected, 'batch SHA-256 disagrees with hashlib'
+    print(f'OK: {len(messages)} messages (0..300 bytes) match hashlib.sha256')
+
+def _rate(fn, n, min_seconds=0.5):
+    # messages/sec of fn(), repeated until at least min_seconds have passed
+    reps, start = 0, time.perf_counter()
+    while True:
+        fn()
+        reps += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return n * reps / elapsed
+
+def benchmark(batch_sizes=(1, 16, 256, 4096, 65536), msg_len=80):
+    # 80 bytes = one Bitcoin block header; pads to 2 blocks
+    print(f'\n{"batch":>7} {"batch msg/s":>12} {"scalar msg/s":>13} {"hashlib msg/s":>14}')
+    for n in batch_sizes:
+        messages = [os.urandom(msg_len) for _ in range(n)]
+        batch_rate = _rate(lambda: sha256_batch(messages), n)
+        scalar_rate = _rate(lambda: [SHA256(m).digest() for m in messages[:256]], min(n, 256))
+        hashlib_rate = _rate(lambda: [hashlib.sha256(m).digest() for m in messages], n)
+        print(f'{n:>7} {batch_rate:>12.0f} {scalar_rate:>13.0f} {hashlib_rate:>14.0f}')
+
+if __name__ == '__main__':
+    check_against_hashlib()
+    benchmark()
@@ -0,0 +1,139 @@
+# Conformance and throughput harness for the educational SHA-256 (sha256_algorithm.py)
+# - FIPS 180-4 / NIST example vectors (incl. one million 'a', streamed)
+# - random fuzzing against hashlib.sha256 around the padding boundaries
+#   (55/56/63/64/65 bytes ...), multi-block inputs, chunked update() and copy()
+# - MB/s throughput; --out appends it to a CSV so speed-ups can be tracked over time
+#
+# Run: python sha256_selftest.py [--fuzz 500] [--seed 0] [--no-bench] [--out FILE]
+# Exit status is non-zero if any check fails.
+
+import argparse
+import csv
+import hashlib
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from sha256_algorithm import SHA256, sha256
+from binary_to_hex import binary, binary_to_hex
+
+# --- Known-answer vectors (FIPS 180-4 examples, NIST CAVS short messages) ---
+
+VECTORS = [
+    (b'', 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855'),
+    (b'abc', 'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad'),
+    (b'abcdbcdecdefdefgefghfghighijhijkijkljklmklmnlmnomnopnopq',
+     '248d6a61d20638b8e5c026930c3e6039a33ce45964ff2167f6ecedd419db06c1'),
+    (b'abcdefghbcdefghicdefghijdefghijkefghijklfghijklmghijklmn'
+     b'hijklmnoijklmnopjklmnopqklmnopqrlmnopqrsmnopqrstnopqrstu',
+     'cf5b16a778af8380036ce59e7b0492370b249b11e8f07a51afac45037afee9d1'),
+    (b'Blockchain', '625da44e4eaf58d61cf048d168aa6f5e492dea166d8bb54ec06c30de07db57e1'),
+]
+MILLION_A = 'cdc76e5c9914fb9281a1c7e284d73e67f1809a48a497200e046d39ccc7112cd0'
+
+# lengths where the padding changes shape: the length field still fits (<= 55),
+# needs an extra block (56..63), exact block multiples and their neighbours
+BOUNDARY_LENGTHS = [0, 1, 55, 56, 57, 63, 64, 65, 111, 112, 119, 120, 127, 128, 129, 191, 192]
+
+failures = []
+
+def check(name, got, expected):
+    if got != expected:
+        failures.append(name)
+        print(f'FAIL {name}: got {got}, expected {expected}')
+
+def test_vectors():
+    for msg, expected in VECTORS:
+        label = msg[:20].decode() + ('...' if len(msg) > 20 else '')
+        check(f'vector sha256({label!r})', sha256(msg), expected)
+        check(f'vector SHA256({label!r})', SHA256(msg).hexdigest(), expected)
+    # one million 'a', fed in 1000-byte chunks through the streaming object
+    h = SHA256()
+    chunk = b'a' * 1000
+    for _ in range(1000):
+        h.update(chunk)
+    check("vector 10^6 x 'a' (streamed)", h.hexdigest(), MILLION_A)
+    check('binary_to_hex(digest of "Blockchain")', binary_to_hex(binary), sha256('Blockchain'))
+    print(f'vectors: {len(VECTORS) * 2 + 2} checks')
+
+def test_fuzz(rounds, rng):
+    lengths = BOUNDARY_LENGTHS + [rng.randrange(0, 1024) for _ in range(rounds)]
+    for n in lengths:
+        msg = rng.randbytes(n)
+        expected = hashlib.sha256(msg).hexdigest()
+        check(f'sha256(len={n})', sha256(msg), expected)
+
+        # random chunking through update(), copy() must not disturb the original
+        h = SHA256()
+        i = 0
+        while i < n:
+            j = i + rng.randrange(0, 130)
+            h.update(msg[i:j])
+            i = j
+        fork = h.copy()
+        fork.update(b'!')
+        check(f'SHA256 chunked(len={n})', h.hexdigest(), expected)
+        check(f'SHA256 copy(len={n})', fork.hexdigest(), hashlib.sha256(msg + b'!').hexdigest())
+        check(f'SHA256 digest bytes(len={n})', h.digest(), hashlib.sha256(msg).digest())
+    print(f'fuzz: {len(lengths)} lengths x 4 checks')
+
+def test_batch(rng):
+    # the NumPy lane implementation, if NumPy is installed
+    try:
+        from sha256_batch import sha256_batch
+    except ImportError:
+        print('batch: skipped (numpy not installed)')
+        return
+    msgs = [rng.randbytes(n) for n in BOUNDARY_LENGTHS + [rng.randrange(0, 300) for _ in range(200)]]
+    check('sha256_batch', sha256_batch(msgs), [hashlib.sha256(m).digest() for m in msgs])
+    print(f'batch: {len(msgs)} messages')
+
+# --- Throughput ---
+
+def throughput(size=1 << 20):
+    data = os.urandom(size)
+    start = time.perf_counter()
+    SHA256(data).digest()
+    edu = size / (time.perf_counter() - start) / 1e6
+    start = time.perf_counter()
+    for _ in range(100):
+        hashlib.sha256(data).digest()
+    ref = 100 * size / (time.perf_counter() - start) / 1e6
+    return edu, ref
+
+def record_throughput(edu, ref, path):
+    new = not os.path.exists(path)
+    with open(path, 'a', newline='') as f:
+        w = csv.writer(f)
+        if new:
+            w.writerow(['timestamp', 'python', 'machine', 'educational_MBps', 'hashlib_MBps'])
+        w.writerow([datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    platform.python_version(), platform.machine(), f'{edu:.4f}', f'{ref:.1f}'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fuzz', type=int, default=500, help='random lengths to fuzz')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-bench', action='store_true', help='skip the throughput measurement')
+    parser.add_argument('--out', default=None, help='append the throughput to this CSV file')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    test_vectors()
+    test_fuzz(args.fuzz, rng)
+    test_batch(rng)
+
+    if not args.no_bench:
+        edu, ref = throughput()
+        print(f'throughput: educational {edu:.3f} MB/s, hashlib {ref:.0f} MB/s')
+        if args.out:
+            record_throughput(edu, ref, args.out)
+            print(f'(appended to {args.out})')
+
+    if failures:
+        print(f'{len(failures)} check(s) FAILED')
+        sys.exit(1)
+    print('all checks passed')
@@ -0,0 +1,214 @@
+"""
+batch.py — Array-backed batch key generation and verification for the qct toy curve.
+
+Used to model whole wallet populations instead of a single Alice:
+  - PointBatch stores many affine points as NumPy arrays (x, y, at-infinity mask).
+  - batch_add adds two batches lane by lane. All slope denominators of the batch
+    are inverted with Montgomery's trick (product tree, ONE modular inverse for
+    the whole batch), which is what makes affine coordinates affordable here.
+  - batch_mul_base / batch_mul / batch_verify work on arrays of scalars and are
+    processed in chunks so millions of wallets fit in bounded memory.
+
+Fields with p < 2^32 use uint64 lanes (products fit in 64 bits); larger toy
+fields fall back to object arrays of Python ints (same code, slower).
+
+Run:
+  python batch.py
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Sequence
+import random
+import time
+
+import numpy as np
+
+from qct import Curve, Point, H_to_int, fixed_base_table, find_curve, mul_base, verify
+
+CHUNK = 1 << 16
+
+
+def lane_dtype(curve: Curve):
+    return np.uint64 if curve.p < 1 << 32 else object
+
+
+@dataclass
+class PointBatch:
+    x: np.ndarray
+    y: np.ndarray
+    inf: np.ndarray     # True = point at infinity (x, y are then meaningless)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @classmethod
+    def from_points(cls, curve: Curve, points: Sequence[Point]) -> "PointBatch":
+        dt = lane_dtype(curve)
+        x = np.array([0 if P is None else P[0] for P in points], dtype=dt)
+        y = np.array([0 if P is None else P[1] for P in points], dtype=dt)
+        return cls(x, y, np.array([P is None for P in points], dtype=bool))
+
+    @classmethod
+    def infinity(cls, curve: Curve, n: int) -> "PointBatch":
+        dt = lane_dtype(curve)
+        return cls(np.zeros(n, dtype=dt), np.zeros(n, dtype=dt), np.ones(n, dtype=bool))
+
+    def to_points(self) -> List[Point]:
+        return [None if i else (int(a), int(b)) for a, b, i in zip(self.x, self.y, self.inf)]
+
+    def __getitem__(self, idx) -> "PointBatch":
+        return PointBatch(self.x[idx], self.y[idx], self.inf[idx])
+
+
+def batch_inverse(a: np.ndarray, p: int) -> np.ndarray:
+    """
+    Montgomery's trick as a product tree: multiply pairs level by level, invert
+    the root once, then walk back down (inverse of a child = inverse of its parent
+    times its sibling). All entries must be non-zero mod p.
+    """
+    n = len(a)
+    if n == 0:
+        return a.copy()
+    one = a.dtype.type(1) if a.dtype != object else 1
+    levels = []
+    cur = a
+    while len(cur) > 1:
+        if len(cur) % 2:
+            cur = np.append(cur, np.array([one], dtype=a.dtype))
+        levels.append(cur)
+        cur = cur[0::2] * cur[1::2] % p
+    inv = np.array([pow(int(cur[0]), -1, p)], dtype=a.dtype)
+    for cur in reversed(levels):
+        inv = inv[:len(cur) // 2]          # drop the inverse of a padding 1
+        out = np.empty_like(cur)
+        out[0::2] = inv * cur[1::2] % p
+        out[1::2] = inv * cur[0::2] % p
+        inv = out
+    return inv[:n]
+
+
+def batch_add(curve: Curve, P: PointBatch, Q: PointBatch) -> PointBatch:
+    """Lane-wise P + Q in affine coordinates, doubling where P == Q."""
+    p = curve.p
+    dt = P.x.dtype
+    same_x = (P.x == Q.x) & ~P.inf & ~Q.inf
+    opposite = same_x & ((P.y + Q.y) % p == 0)
+    doubling = same_x & ~opposite
+    special = P.inf | Q.inf | opposite
+
+    a = dt.type(curve.a % p) if dt != object else curve.a % p
+    num = np.where(doubling, (3 * (P.x * P.x % p) + a) % p, (Q.y + p - P.y) % p)
+    den = np.where(doubling, 2 * P.y % p, (Q.x + p - P.x) % p)
+    den = np.where(special, 1, den).astype(dt)
+    m = num * batch_inverse(den, p) % p
+
+    x3 = (m * m % p + 2 * p - P.x - Q.x) % p
+    y3 = (m * ((P.x + p - x3) % p) % p + p - P.y) % p
+
+    x3 = np.where(P.inf, Q.x, np.where(Q.inf, P.x, x3)).astype(dt)
+    y3 = np.where(P.inf, Q.y, np.where(Q.inf, P.y, y3)).astype(dt)
+    inf = (P.inf & Q.inf) | opposite
+    return PointBatch(x3, y3, inf)
+
+
+def _as_scalars(ks) -> np.ndarray:
+    ks = np.asarray(ks, dtype=object)
+    return ks.astype(np.uint64) if len(ks) and max(ks) < 1 << 64 else ks
+
+
+def batch_mul_base(curve: Curve, G: Point, ks, chunk: int = CHUNK) -> PointBatch:
+    """k_i * G for every scalar, one batch_add per w-bit window of the cached G table."""
+    table = fixed_base_table(curve, G)
+    rows = [PointBatch.from_points(curve, row) for row in table.rows]
+    ks = _as_scalars(ks)
+    if len(ks) and int(max(ks)).bit_length() > table.max_bits:
+        raise ValueError("scalar larger than the fixed-base table; reduce it mod ord(G)")
+    mask = (1 << table.w) - 1
+    out = []
+    for start in range(0, len(ks), chunk):
+        k = ks[start:start + chunk]
+        R = PointBatch.infinity(curve, len(k))
+        for i, row in enumerate(rows):
+            digit = ((k >> (table.w * i)) & mask).astype(np.int64)
+            if digit.any():
+                R = batch_add(curve, R, row[digit])
+        out.append(R)
+    return _concat(curve, out)
+
+
+def batch_mul(curve: Curve, P: PointBatch, ks, chunk: int = CHUNK) -> PointBatch:
+    """k_i * P_i lane by lane (vectorised double-and-add)."""
+    ks = _as_scalars(ks)
+    out = []
+    for start in range(0, len(ks), chunk):
+        k = ks[start:start + chunk]
+        N = P[start:start + chunk]
+        R = PointBatch.infinity(curve, len(k))
+        bits = int(max(k)).bit_length() if len(k) else 0
+        for i in range(bits):
+            bit = ((k >> i) & 1).astype(bool)
+            if bit.any():
+                S = batch_add(curve, R, N)
+                R = PointBatch(np.where(bit, S.x, R.x).astype(R.x.dtype),
+                               np.where(bit, S.y, R.y).astype(R.y.dtype),
+                               np.where(bit, S.inf, R.inf))
+            if i + 1 < bits:
+                N = batch_add(curve, N, N)
+        out.append(R)
+    return _concat(curve, out)
+
+
+def _concat(curve: Curve, parts: List[PointBatch]) -> PointBatch:
+    if not parts:
+        return PointBatch.infinity(curve, 0)
+    return PointBatch(np.concatenate([b.x for b in parts]),
+                      np.concatenate([b.y for b in parts]),
+                      np.concatenate([b.inf for b in parts]))
+
+
+def batch_equal(P: PointBatch, Q: PointBatch) -> np.ndarray:
+    return (P.inf & Q.inf) | (~P.inf & ~Q.inf & (P.x == Q.x) & (P.y == Q.y))
+
+
+def batch_verify(curve: Curve, G: Point, Qs: PointBatch, msgs: Sequence[str],
+                 sigs, chunk: int = CHUNK) -> np.ndarray:
+    """Vectorised verify(): s_i*G == H(m_i)*Q_i for every lane; returns a bool array."""
+    hs = [H_to_int(m, curve.p) for m in msgs]
+    left = batch_mul_base(curve, G, sigs, chunk)
+    right = batch_mul(curve, Qs, hs, chunk)
+    return batch_equal(left, right)
+
+
+def main():
+    rng = random.Random(1)
+    domain = find_curve(32, rng)
+    curve, G, n = domain.curve, domain.G, domain.n
+    print(f"Curve: p={curve.p} ({curve.p.bit_length()} bits), ord(G)={n}")
+
+    for wallets in (1_000, 10_000, 100_000):
+        ds = [rng.randrange(1, n) for _ in range(wallets)]
+        msgs = [f"pay {i} to BOB" for i in range(wallets)]
+        # qct.sign reduces mod p; reduce mod ord(G) instead so honest signatures
+        # verify on curves where ord(G) != p, then tamper with 1% of them
+        sigs = [H_to_int(m, curve.p) * d % n for d, m in zip(ds, msgs)]
+        for i in rng.sample(range(wallets), wallets // 100):
+            sigs[i] = (sigs[i] + 1) % n
+
+        t0 = time.perf_counter()
+        Qs = batch_mul_base(curve, G, ds)
+        t_key = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ok = batch_verify(curve, G, Qs, msgs, sigs)
+        t_ver = time.perf_counter() - t0
+
+        sample = rng.sample(range(wallets), 50)
+        pts = Qs.to_points()
+        assert all(pts[i] == mul_base(curve, ds[i], G) for i in sample)
+        assert all(ok[i] == verify(curve, G, pts[i], msgs[i], sigs[i]) for i in sample)
+        print(f"{wallets:>8} wallets: keygen {wallets / t_key:>10.0f}/s, "
+              f"verify {wallets / t_ver:>10.0f}/s, valid {ok.mean():.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+bench_scalar_mul.py — Point operations per key generation / verification,
+plain double-and-add vs. fixed-base tables, wNAF and Shamir's trick.
+
+"Point operations" are calls to qct.add (additions and doublings); they are
+counted by temporarily wrapping qct.add, so the library itself pays nothing.
+
+Run:
+  python bench_scalar_mul.py
+"""
+
+from __future__ import annotations
+import random
+import time
+
+import qct
+from qct import Curve, DomainParams, H_to_int, find_curve, fixed_base_table, mul, mul_base, sign
+
+N_SIGS = 200
+
+
+class count_ops:
+    def __enter__(self):
+        self.ops = 0
+        self._add = qct.add
+
+        def counting_add(curve, P, Q):
+            self.ops += 1
+            return self._add(curve, P, Q)
+
+        qct.add = counting_add
+        return self
+
+    def __exit__(self, *exc):
+        qct.add = self._add
+
+
+def verify_plain(curve, G, Q, msg, s):
+    # verify() as it was before: two independent double-and-add multiplications
+    return mul(curve, s, G) == mul(curve, H_to_int(msg, curve.p), Q)
+
+
+def run(domain: DomainParams, rng: random.Random):
+    curve, G, n = domain.curve, domain.G, domain.n
+    keys = [rng.randrange(1, n) for _ in range(N_SIGS)]
+    msgs = [f"pay {i} to BOB" for i in range(N_SIGS)]
+    fixed_base_table(curve, G)          # one-off precomputation, not timed
+
+    rows = []
+    for label, keygen, verify in (("before", mul, verify_plain),
+                                  ("after", mul_base, qct.verify)):
+        with count_ops() as c:
+            t0 = time.perf_counter()
+            pubs = [keygen(curve, d, G) for d in keys]
+            t_key = time.perf_counter() - t0
+        key_ops = c.ops
+        sigs = [sign(curve, G, d, m) for d, m in zip(keys, msgs)]
+        with count_ops() as c:
+            t0 = time.perf_counter()
+            for Q, m, s in zip(pubs, msgs, sigs):
+                verify(curve, G, Q, m, s)
+            t_ver = time.perf_counter() - t0
+        rows.append((label, key_ops / N_SIGS, c.ops / N_SIGS,
+                     1e6 * t_key / N_SIGS, 1e6 * t_ver / N_SIGS))
+    return rows
+
+
+def main():
+    rng = random.Random(1)
+    domains = [DomainParams(Curve(233, 1, 1), (0, 1), 79, 3)]
+    domains += [find_curve(bits, rng) for bits in (32, 48)]
+    print(f"{'p bits':>6} {'':>6} {'keygen ops':>10} {'verify ops':>10} "
+          f"{'keygen us':>10} {'verify us':>10}")
+    for d in domains:
+        for label, kops, vops, tk, tv in run(d, rng):
+            print(f"{d.curve.p.bit_length():>6} {label:>6} {kops:>10.1f} {vops:>10.1f} "
+                  f"{tk:>10.1f} {tv:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
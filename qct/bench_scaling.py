@@ -0,0 +1,202 @@
+"""
+bench_scaling.py — Attack-cost scaling suite for the qct toy curves.
+
+Sweeps curve size (bits of p) and private-key size (bits of d). For every grid
+point it times key generation, signing, verification and each discrete-log
+attacker, prints one row per (grid point, operation) (appended to a CSV with
+--out) and finally fits scaling exponents:
+
+  attackers       seconds ~ N^alpha   N = size of the key search space
+                                      (min(ord(G), 2^key_bits); ord(G) for rho,
+                                      which cannot exploit short keys)
+  keygen/sign/... seconds ~ bits^beta (polynomial in the key length)
+
+Expected: alpha ~ 1 for the linear scan, ~ 0.5 for BSGS and rho — exponential
+in the key length — while the honest operations grow polynomially. Each row is
+tagged with the git revision so CSVs from different code versions can be
+concatenated and compared.
+
+Run:
+  python bench_scaling.py [--trials 5] [--out scaling.csv [--plot]]
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+from math import log2
+from statistics import mean
+from typing import Dict, List
+import argparse
+import csv
+import os
+import random
+import subprocess
+import time
+
+from qct import (
+    LinearScanAttacker, BabyStepGiantStepAttacker, PollardRhoAttacker,
+    find_curve, mul_base, sign, verify,
+)
+
+CURVE_BITS = [12, 16, 20, 24, 28, 32]
+KEY_BITS = [8, 12, 16, 20, 24, None]          # None = full-size key (d < ord(G))
+LINEAR_MAX_SPACE = 1 << 16                    # skip the linear scan above this
+
+
+@dataclass
+class Row:
+    revision: str
+    curve_bits: int
+    key_bits: int
+    order: int
+    operation: str
+    search_space: int
+    trials: int
+    seconds: float          # mean per call
+    group_ops: float        # mean per call (attackers only)
+    table_size: int         # max entries kept (attackers only)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _time(fn, args_list) -> float:
+    t0 = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - t0) / len(args_list)
+
+
+def sweep(trials: int, rng: random.Random) -> List[Row]:
+    rev = git_revision()
+    rows = []
+    for cbits in CURVE_BITS:
+        domain = find_curve(cbits, rng)
+        curve, G, n = domain.curve, domain.G, domain.n
+        for kbits in KEY_BITS:
+            if kbits is not None and kbits > n.bit_length() - 1:
+                continue
+            bound = n if kbits is None else 1 << kbits
+            kb = n.bit_length() if kbits is None else kbits
+            ds = [rng.randrange(1, bound) for _ in range(trials)]
+            msgs = [f"pay {i} to BOB" for i in range(trials)]
+            pubs = [mul_base(curve, d, G) for d in ds]
+            sigs = [sign(curve, G, d, m) for d, m in zip(ds, msgs)]
+
+            def add_row(op, space, seconds, ops=0.0, table=0):
+                rows.append(Row(rev, cbits, kb, n, op, space, trials, seconds, ops, table))
+                print(f"{cbits:>6} {kb:>6} {op:>8} {space:>14} {seconds:>11.6f} {ops:>12.0f}")
+
+            add_row("keygen", bound, _time(lambda d: mul_base(curve, d, G), [(d,) for d in ds]))
+            add_row("sign", bound, _time(lambda d, m: sign(curve, G, d, m), list(zip(ds, msgs))))
+            add_row("verify", bound, _time(lambda Q, m, s: verify(curve, G, Q, m, s),
+                                           list(zip(pubs, msgs, sigs))))
+
+            attackers = [BabyStepGiantStepAttacker(order=bound),
+                         PollardRhoAttacker(order=n, seed=rng.getrandbits(32))]
+            if bound <= LINEAR_MAX_SPACE:
+                attackers.insert(0, LinearScanAttacker(max_k=bound))
+            for attacker in attackers:
+                if isinstance(attacker, PollardRhoAttacker) and kbits is not None:
+                    continue        # rho ignores the key size; measured once per curve
+                space = n if isinstance(attacker, PollardRhoAttacker) else bound
+                secs, ops, table = [], [], 0
+                for d, Q in zip(ds, pubs):
+                    k = attacker.solve(curve, G, Q)
+                    assert k is not None and mul_base(curve, k, G) == Q
+                    secs.append(attacker.stats.seconds)
+                    ops.append(attacker.stats.group_ops)
+                    table = max(table, attacker.stats.table_size)
+                add_row(attacker.name, space, mean(secs), mean(ops), table)
+    return rows
+
+
+def fit_slope(xs: List[float], ys: List[float]) -> float:
+    mx, my = mean(xs), mean(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else float("nan")
+
+
+def fit_exponents(rows: List[Row]) -> Dict[str, float]:
+    """alpha in seconds ~ N^alpha for attackers, beta in seconds ~ bits^beta otherwise."""
+    by_op: Dict[str, List[Row]] = {}
+    for r in rows:
+        by_op.setdefault(r.operation, []).append(r)
+    out = {}
+    for op, rs in by_op.items():
+        rs = [r for r in rs if r.seconds > 0]
+        if len(rs) < 2:
+            continue
+        if op in ("keygen", "sign", "verify"):
+            xs = [log2(r.key_bits) for r in rs]
+        else:
+            xs = [log2(r.search_space) for r in rs]
+        out[op] = fit_slope(xs, [log2(r.seconds) for r in rs])
+    return out
+
+
+def write_csv(rows: List[Row], path: str):
+    new = not os.path.exists(path)
+    with open(path, "a", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(asdict(rows[0])))
+        if new:
+            writer.writeheader()
+        writer.writerows(asdict(r) for r in rows)
+
+
+def plot(rows: List[Row], path: str):
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+    for op in sorted({r.operation for r in rows}):
+        rs = sorted((r for r in rows if r.operation == op), key=lambda r: r.search_space)
+        if op in ("keygen", "sign", "verify"):
+            ax2.loglog([r.key_bits for r in rs], [r.seconds for r in rs], "o-", label=op)
+        else:
+            ax1.loglog([r.search_space for r in rs], [r.seconds for r in rs], "o-", label=op)
+    ax1.set_xlabel("key search space N")
+    ax1.set_ylabel("seconds per key")
+    ax1.set_title("Classical discrete-log attacks")
+    ax2.set_xlabel("key bits")
+    ax2.set_ylabel("seconds per call")
+    ax2.set_title("Honest operations")
+    for ax in (ax1, ax2):
+        ax.legend()
+        ax.grid(True, which="both", alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default=None, help="CSV file to append results to")
+    parser.add_argument("--trials", type=int, default=5, help="keys per grid point")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--plot", action="store_true", help="also write <out>.png")
+    args = parser.parse_args()
+    if args.plot and not args.out:
+        parser.error("--plot writes <out>.png and needs --out")
+
+    print(f"{'p bits':>6} {'d bits':>6} {'op':>8} {'search space':>14} "
+          f"{'sec/call':>11} {'group ops':>12}")
+    rows = sweep(args.trials, random.Random(args.seed))
+
+    print("\nFitted scaling exponents")
+    for op, slope in fit_exponents(rows).items():
+        law = "bits" if op in ("keygen", "sign", "verify") else "N"
+        print(f"  {op:>8}: seconds ~ {law}^{slope:.2f}")
+    if args.out:
+        write_csv(rows, args.out)
+        print(f"\n{len(rows)} rows appended to {args.out}")
+
+    if args.plot:
+        plot(rows, os.path.splitext(args.out)[0] + ".png")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+mempool_sim.py — Discrete-event simulation of exposed-pubkey attacks on many wallets.
+
+qct.py scripts a single race between Alice's spend and Eve's forgery. This
+simulator runs that race for a whole wallet population over time:
+
+  - Wallets broadcast spends (Poisson arrivals). Broadcasting reveals the pubkey.
+  - The attacker queues every newly exposed key on a fixed number of solver
+    slots. Solve times come from the group-operation counts of a real
+    DlogAttacker from qct.py (calibrated on a toy curve, optionally rescaled by
+    sqrt(n) to a larger target curve) divided by the attacker's throughput.
+  - Blocks arrive with exponential inter-block times and confirm the mempool.
+  - If the key is recovered while the spend is still unconfirmed, the attacker
+    races it with a competing spend of the whole balance and wins with
+    probability `race_win_prob`. If the wallet reused its address for change,
+    funds left there after confirmation are swept as well. Change sent to a fresh
+    address (new key) ends the exposure and makes a running solve worthless.
+
+The scheduler is a heapq of (time, seq, kind, wallet, epoch) events. Independent
+Monte Carlo runs are spread over a process pool.
+
+Run:
+  python mempool_sim.py
+"""
+
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from math import sqrt
+from statistics import mean, pstdev
+from typing import List, Optional, Sequence
+import heapq
+import os
+import random
+
+from qct import DlogAttacker, BabyStepGiantStepAttacker, PollardRhoAttacker, find_curve, mul_base
+
+SPEND, BLOCK, SOLVED = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class SimConfig:
+    n_wallets: int = 1_000
+    horizon: float = 7 * 24 * 3600.0      # simulated seconds
+    spend_interval: float = 24 * 3600.0   # mean time between spends per wallet
+    block_interval: float = 600.0         # mean time between blocks
+    spend_fraction: float = 0.3           # share of the balance paid out per spend
+    address_reuse: float = 0.2            # probability change goes back to the same address
+    solver_slots: int = 4                 # keys the attacker can work on in parallel
+    ops_per_sec: float = 1e3              # group operations per second per slot
+    race_win_prob: float = 0.5            # chance a forged spend beats a pending one
+
+
+@dataclass
+class SimResult:
+    initial_funds: int
+    stolen: int
+    keys_exposed: int
+    keys_recovered: int
+    races_won: int
+    sweeps: int
+
+    @property
+    def stolen_fraction(self) -> float:
+        return self.stolen / self.initial_funds if self.initial_funds else 0.0
+
+
+def calibrate_attacker(attacker: DlogAttacker, bits: int = 24, samples: int = 32,
+                       target_bits: Optional[int] = None, seed: int = 0) -> List[float]:
+    """
+    Group-operation counts of `attacker` on random keys of a `bits`-bit toy curve.
+    With target_bits, counts are rescaled by sqrt(n_target / n) — the square-root
+    law all generic classical attacks follow — to model a larger curve.
+    """
+    rng = random.Random(seed)
+    domain = find_curve(bits, rng)
+    scale = sqrt(2.0 ** (target_bits - bits)) if target_bits else 1.0
+    ops = []
+    for _ in range(samples):
+        d = rng.randrange(1, domain.n)
+        Q = mul_base(domain.curve, d, domain.G)
+        k = attacker.solve(domain.curve, domain.G, Q)
+        if k is None:
+            raise RuntimeError(f"{attacker.name} failed to recover a {bits}-bit calibration key")
+        ops.append(attacker.stats.group_ops * scale)
+    return ops
+
+
+def simulate(cfg: SimConfig, attack_ops: Sequence[float], seed: int) -> SimResult:
+    rng = random.Random(seed)
+    n = cfg.n_wallets
+    balance = [rng.randint(1, 1_000) for _ in range(n)]
+    epoch = [0] * n                 # bumps whenever funds move to a fresh key
+    exposed = [False] * n           # pubkey of the current key is public
+    recovered = [False] * n         # attacker knows the current key
+    pending = [0] * n               # amount of the unconfirmed spend (0 = none)
+    mempool: List[int] = []
+    result = SimResult(sum(balance), 0, 0, 0, 0, 0)
+
+    events: list = []
+    seq = 0
+
+    def schedule(t: float, kind: int, w: int = -1, ep: int = 0):
+        nonlocal seq
+        if t <= cfg.horizon:
+            heapq.heappush(events, (t, seq, kind, w, ep))
+            seq += 1
+
+    free_slots = cfg.solver_slots
+    queue: deque = deque()
+
+    def start_solves(now: float):
+        nonlocal free_slots
+        while free_slots and queue:
+            w, ep = queue.popleft()
+            if ep != epoch[w] or balance[w] == 0:
+                continue            # key retired while waiting
+            free_slots -= 1
+            schedule(now + rng.choice(attack_ops) / cfg.ops_per_sec, SOLVED, w, ep)
+
+    def sweep(w: int):
+        result.stolen += balance[w]
+        result.sweeps += 1
+        balance[w] = 0
+
+    for w in range(n):
+        schedule(rng.expovariate(1 / cfg.spend_interval), SPEND, w)
+    schedule(rng.expovariate(1 / cfg.block_interval), BLOCK)
+
+    while events:
+        now, _, kind, w, ep = heapq.heappop(events)
+
+        if kind == SPEND:
+            if balance[w] == 0:
+                continue
+            if pending[w]:
+                schedule(now + cfg.block_interval, SPEND, w)
+                continue
+            pending[w] = max(1, int(balance[w] * cfg.spend_fraction))
+            mempool.append(w)
+            if not exposed[w]:
+                exposed[w] = True
+                result.keys_exposed += 1
+                queue.append((w, epoch[w]))
+                start_solves(now)
+
+        elif kind == BLOCK:
+            for v in mempool:
+                if not pending[v]:
+                    continue        # replaced by a forged spend
+                balance[v] -= pending[v]
+                pending[v] = 0
+                if rng.random() >= cfg.address_reuse:
+                    # change to a fresh address: new, unexposed key
+                    epoch[v] += 1
+                    exposed[v] = recovered[v] = False
+                elif recovered[v] and balance[v]:
+                    sweep(v)
+                if balance[v]:
+                    schedule(now + rng.expovariate(1 / cfg.spend_interval), SPEND, v)
+            mempool.clear()
+            schedule(now + rng.expovariate(1 / cfg.block_interval), BLOCK)
+
+        elif kind == SOLVED:
+            free_slots += 1
+            if ep == epoch[w]:
+                result.keys_recovered += 1
+                recovered[w] = True
+                if pending[w]:
+                    if rng.random() < cfg.race_win_prob:
+                        result.races_won += 1
+                        pending[w] = 0
+                        sweep(w)
+                elif balance[w]:
+                    sweep(w)
+            start_solves(now)
+
+    return result
+
+
+def _run(args):
+    cfg, attack_ops, seed = args
+    return simulate(cfg, attack_ops, seed)
+
+
+def monte_carlo(cfg: SimConfig, attack_ops: Sequence[float], runs: int,
+                workers: Optional[int] = None, seed: int = 0) -> List[SimResult]:
+    jobs = [(cfg, list(attack_ops), seed + i) for i in range(runs)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [_run(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run, jobs, chunksize=max(1, runs // (4 * workers))))
+
+
+def main():
+    runs = 64
+    print("Calibrating attackers on a 24-bit toy curve (rescaled to 40 bits)...")
+    attackers = {
+        "bsgs": calibrate_attacker(BabyStepGiantStepAttacker(), target_bits=40),
+        "rho": calibrate_attacker(PollardRhoAttacker(seed=1), target_bits=40),
+    }
+    for name, ops in attackers.items():
+        print(f"  {name}: mean {mean(ops):,.0f} group ops per key")
+
+    print(f"\n{runs} Monte Carlo runs per row, {SimConfig.n_wallets} wallets, one week")
+    print(f"{'attacker':>8} {'ops/s':>9} {'reuse':>6} {'stolen':>8} {'±':>7} "
+          f"{'exposed':>8} {'recovered':>9} {'races':>6}")
+    for name, ops in attackers.items():
+        for ops_per_sec in (1e2, 1e3, 1e4):
+            for reuse in (0.0, 0.5):
+                cfg = SimConfig(ops_per_sec=ops_per_sec, address_reuse=reuse)
+                res = monte_carlo(cfg, ops, runs)
+                frac = [r.stolen_fraction for r in res]
+                print(f"{name:>8} {ops_per_sec:>9.0e} {reuse:>6.1f} {mean(frac):>8.2%} "
+                      f"{pstdev(frac):>7.2%} {mean(r.keys_exposed for r in res):>8.0f} "
+                      f"{mean(r.keys_recovered for r in res):>9.0f} "
+                      f"{mean(r.races_won for r in res):>6.0f}")
+
+
+if __name__ == "__main__":
+    main()
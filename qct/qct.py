@@ -20,9 +20,15 @@ Run:
 """
 
 from __future__ import annotations
+from array import array
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from dataclasses import dataclass
-from typing import Optional, Tuple, Dict
+from functools import lru_cache
+from math import gcd, isqrt
+from typing import Optional, Tuple, Dict, List
 import hashlib
+import random
+import time
 
 
 # -----------------------------
@@ -50,6 +56,13 @@ def is_on_curve(curve: Curve, P: Point) -> bool:
     return (y * y - (x * x * x + curve.a * x + curve.b)) % curve.p == 0
 
 
+def neg(curve: Curve, P: Point) -> Point:
+    if P is None:
+        return None
+    x, y = P
+    return (x, (-y) % curve.p)
+
+
 def add(curve: Curve, P: Point, Q: Point) -> Point:
     if P is None:
         return Q
@@ -85,25 +98,355 @@ def mul(curve: Curve, k: int, P: Point) -> Point:
     return R
 
 
+# -----------------------------
+# Faster scalar multiplication
+# -----------------------------
+#
+# mul() above is textbook double-and-add: ~log2(k) doublings + ~log2(k)/2 additions.
+#   - wNAF digits cut the additions to ~log2(k)/(w+1) for an arbitrary point.
+#   - A fixed-base window table for G (built once, cached per curve) removes the
+#     doublings entirely: k*G is ~log2(k)/w table additions.
+#   - Shamir's trick shares one doubling chain between the two scalars of
+#     s*G - h*Q inside verify().
+
+def wnaf(k: int, w: int = 4) -> List[int]:
+    """Width-w non-adjacent form of k >= 0, least significant digit first."""
+    digits = []
+    while k > 0:
+        if k & 1:
+            d = k & ((1 << w) - 1)
+            if d >= 1 << (w - 1):
+                d -= 1 << w
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
+        k >>= 1
+    return digits
+
+
+def _odd_multiples(curve: Curve, P: Point, w: int) -> List[Point]:
+    # [P, 3P, 5P, ..., (2^(w-1) - 1) P]
+    P2 = add(curve, P, P)
+    table = [P]
+    for _ in range((1 << (w - 2)) - 1):
+        table.append(add(curve, table[-1], P2))
+    return table
+
+
+def mul_wnaf(curve: Curve, k: int, P: Point, w: int = 4) -> Point:
+    return mul2(curve, k, P, 0, None, w)
+
+
+def mul2(curve: Curve, k1: int, P1: Point, k2: int, P2: Point, w: int = 4) -> Point:
+    """k1*P1 + k2*P2 with interleaved wNAF digits (Shamir's trick)."""
+    n1, n2 = wnaf(k1, w), wnaf(k2, w)
+    t1 = _odd_multiples(curve, P1, w) if n1 and P1 is not None else []
+    t2 = _odd_multiples(curve, P2, w) if n2 and P2 is not None else []
+    R = None
+    for i in range(max(len(n1), len(n2)) - 1, -1, -1):
+        R = add(curve, R, R)
+        for digits, table in ((n1, t1), (n2, t2)):
+            if i < len(digits) and digits[i] and table:
+                d = digits[i]
+                T = table[abs(d) >> 1]
+                R = add(curve, R, T if d > 0 else neg(curve, T))
+    return R
+
+
+@dataclass(frozen=True)
+class FixedBaseTable:
+    """rows[i][j] = j * 2^(w*i) * G for every w-bit window i of a scalar."""
+    w: int
+    rows: Tuple[Tuple[Point, ...], ...]
+
+    @property
+    def max_bits(self) -> int:
+        return self.w * len(self.rows)
+
+
+@lru_cache(maxsize=None)
+def fixed_base_table(curve: Curve, G: Point, w: int = 4) -> FixedBaseTable:
+    """Built once per (curve, G); covers scalars up to the Hasse bound."""
+    bits = hasse_bound(curve).bit_length()
+    rows = []
+    base = G
+    for _ in range(-(-bits // w)):
+        row = [None]
+        for _ in range((1 << w) - 1):
+            row.append(add(curve, row[-1], base))
+        rows.append(tuple(row))
+        base = add(curve, row[-1], base)       # 2^w * base
+    return FixedBaseTable(w, tuple(rows))
+
+
+def mul_base(curve: Curve, k: int, G: Point) -> Point:
+    """k*G for a fixed generator G using its cached window table."""
+    table = fixed_base_table(curve, G)
+    if k < 0 or k.bit_length() > table.max_bits:
+        return mul(curve, k, G)
+    mask = (1 << table.w) - 1
+    R = None
+    for row in table.rows:
+        if k == 0:
+            break
+        if k & mask:
+            R = add(curve, R, row[k & mask])
+        k >>= table.w
+    return R
+
+
 def find_generator_point(curve: Curve, start_x: int = 0, max_tries: int = 10_000) -> Point:
     """
-    Finds any point on the curve by scanning x and attempting to find y such that:
+    Finds any point on the curve by scanning x and solving for y such that:
         y^2 ≡ x^3 + a x + b (mod p)
-    For small p, brute scanning is fine. This avoids hardcoding a potentially invalid G.
+    y comes from a Tonelli–Shanks square root (the smaller of the two roots), so
+    each x costs O(log p) instead of a scan over all p candidates.
+    This avoids hardcoding a potentially invalid G. It does NOT check the order
+    of the point; use find_prime_order_generator for that.
     """
     p = curve.p
     for dx in range(max_tries):
         x = (start_x + dx) % p
         rhs = (x * x * x + curve.a * x + curve.b) % p
-        # brute scan y
-        for y in range(p):
-            if (y * y) % p == rhs:
-                P = (x, y)
-                if is_on_curve(curve, P):
-                    return P
+        y = sqrt_mod(rhs, p)
+        if y is not None:
+            P = (x, min(y, (-y) % p))
+            if is_on_curve(curve, P):
+                return P
     raise RuntimeError("Could not find a curve point; choose different parameters.")
 
 
+# -----------------------------------------
+# Curve setup: square roots, group order, generators
+# -----------------------------------------
+
+_SMALL_PRIMES = [q for q in range(2, 1000) if all(q % r for r in range(2, isqrt(q) + 1))]
+
+
+def is_probable_prime(n: int) -> bool:
+    # Miller–Rabin; deterministic for n < 3.3e24 with these bases
+    if n < 2:
+        return False
+    for q in _SMALL_PRIMES[:13]:
+        if n % q == 0:
+            return n == q
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _SMALL_PRIMES[:13]:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def random_prime(bits: int, rng: random.Random) -> int:
+    while True:
+        n = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if is_probable_prime(n):
+            return n
+
+
+def _pollard_brent(n: int, rng: random.Random) -> int:
+    # returns a non-trivial factor of the composite n
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factorize(n: int, rng: Optional[random.Random] = None) -> Dict[int, int]:
+    """Prime factorisation {prime: exponent}: trial division, then Pollard–Brent rho."""
+    rng = rng or random.Random(0)
+    factors: Dict[int, int] = {}
+    for q in _SMALL_PRIMES:
+        while n % q == 0:
+            factors[q] = factors.get(q, 0) + 1
+            n //= q
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_probable_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d = _pollard_brent(m, rng)
+            stack += [d, m // d]
+    return factors
+
+
+def sqrt_mod(a: int, p: int) -> Optional[int]:
+    """
+    Tonelli–Shanks: a root y of y^2 ≡ a (mod p) for an odd prime p, or None if
+    a is a non-residue. The other root is p - y.
+    """
+    a %= p
+    if a == 0:
+        return 0
+    if pow(a, (p - 1) // 2, p) != 1:       # Euler's criterion
+        return None
+    if p % 4 == 3:
+        return pow(a, (p + 1) // 4, p)
+    # write p - 1 = q * 2^s with q odd
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+    z = 2
+    while pow(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+    m, c, t, r = s, pow(z, q, p), pow(a, q, p), pow(a, (q + 1) // 2, p)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % p
+            i += 1
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c, t, r = i, b * b % p, t * b * b % p, r * b % p
+    return r
+
+
+def is_nonsingular(curve: Curve) -> bool:
+    return (4 * curve.a ** 3 + 27 * curve.b ** 2) % curve.p != 0
+
+
+def random_point(curve: Curve, rng: random.Random) -> Point:
+    p = curve.p
+    while True:
+        x = rng.randrange(p)
+        y = sqrt_mod((x * x * x + curve.a * x + curve.b) % p, p)
+        if y is not None:
+            return (x, y if rng.getrandbits(1) else (-y) % p)
+
+
+def point_order(curve: Curve, P: Point, multiple: int,
+                factors: Optional[Dict[int, int]] = None) -> int:
+    """Exact order of P given any multiple of it (e.g. the group order)."""
+    factors = factors or factorize(multiple)
+    order = multiple
+    for q in factors:
+        while order % q == 0 and mul(curve, order // q, P) is None:
+            order //= q
+    return order
+
+
+def _multiple_in_hasse_interval(curve: Curve, P: Point, lo: int, hi: int) -> int:
+    # BSGS over the interval: find m in [lo, hi] with m*P = O in O(sqrt(hi - lo)) ops
+    s = isqrt(hi - lo) + 1
+    baby: Dict[Point, int] = {}
+    R = None
+    for j in range(s):
+        baby.setdefault(R, j)
+        R = add(curve, R, P)
+    giant = neg(curve, mul(curve, lo, P))      # -(lo + i*s) * P
+    step = neg(curve, mul(curve, s, P))
+    for i in range(s + 1):
+        j = baby.get(giant)
+        if j is not None:
+            return lo + i * s + j
+        giant = add(curve, giant, step)
+    raise RuntimeError("no multiple of ord(P) in the Hasse interval; is p prime?")
+
+
+def curve_order(curve: Curve, rng: Optional[random.Random] = None) -> int:
+    """
+    #E(F_p). Small p: exact count p + 1 + sum of Legendre symbols.
+    Larger p: Mestre-style BSGS — find the multiple of ord(P) inside the Hasse
+    interval [p+1-2√p, p+1+2√p] for random P until the lcm of the point orders
+    leaves only one candidate. O(p^(1/4)) group operations per point.
+    """
+    p = curve.p
+    if p < 1 << 12:
+        total = p + 1
+        for x in range(p):
+            rhs = (x * x * x + curve.a * x + curve.b) % p
+            if rhs:
+                total += 1 if pow(rhs, (p - 1) // 2, p) == 1 else -1
+        return total
+
+    rng = rng or random.Random(0)
+    lo, hi = p + 1 - 2 * isqrt(p) - 1, p + 1 + 2 * isqrt(p) + 1
+    lcm = 1
+    for _ in range(32):
+        P = random_point(curve, rng)
+        o = point_order(curve, P, _multiple_in_hasse_interval(curve, P, lo, hi))
+        lcm = lcm * o // gcd(lcm, o)
+        first = -(-lo // lcm) * lcm
+        if first + lcm > hi:
+            return first
+    raise RuntimeError("could not pin down the group order (group of small exponent)")
+
+
+@dataclass(frozen=True)
+class DomainParams:
+    curve: Curve
+    G: Point
+    n: int      # prime order of G
+    h: int      # cofactor, #E = h * n
+
+
+def find_prime_order_generator(curve: Curve, rng: Optional[random.Random] = None,
+                               order: Optional[int] = None) -> DomainParams:
+    """Generator of the largest prime-order subgroup; n*G == O is checked."""
+    rng = rng or random.Random(0)
+    N = order if order is not None else curve_order(curve, rng)
+    n = max(factorize(N, rng))
+    h = N // n
+    while True:
+        G = mul(curve, h, random_point(curve, rng))
+        if G is not None:
+            if mul(curve, n, G) is not None:
+                raise RuntimeError("group order check failed")
+            return DomainParams(curve, G, n, h)
+
+
+def find_curve(bits: int, rng: Optional[random.Random] = None,
+               max_cofactor: int = 4) -> DomainParams:
+    """
+    Random curve over a `bits`-bit prime field whose group order is a prime times
+    a cofactor <= max_cofactor. Practical up to ~48-bit p in pure Python.
+    """
+    rng = rng or random.Random(0)
+    p = random_prime(bits, rng)
+    while True:
+        curve = Curve(p=p, a=rng.randrange(p), b=rng.randrange(1, p))
+        if not is_nonsingular(curve):
+            continue
+        N = curve_order(curve, rng)
+        factors = factorize(N, rng)
+        n = max(factors)
+        if N // n <= max_cofactor and n > 3:
+            return find_prime_order_generator(curve, rng, order=N)
+
+
 # -----------------------------------------
 # Toy "signature": Schnorr-like (toy only)
 # -----------------------------------------
@@ -118,9 +461,8 @@ def sign(curve: Curve, G: Point, d: int, msg: str) -> int:
 
 
 def verify(curve: Curve, G: Point, Q: Point, msg: str, s: int) -> bool:
-    left = mul(curve, s, G)
-    right = mul(curve, H_to_int(msg, curve.p), Q)
-    return left == right
+    # s*G == h*Q  <=>  s*G + h*(-Q) == O, evaluated with one shared doubling chain
+    return mul2(curve, s, G, H_to_int(msg, curve.p), neg(curve, Q)) is None
 
 
 # -----------------------------------------
@@ -151,18 +493,99 @@ class Tx:
     note: str
 
 
-class Ledger:
+class ExposureIndex:
+    """
+    Which addresses have revealed their public key, since when, and how much
+    value is still sitting behind them (i.e. is at risk once ECDLP falls).
+
+    Per address: first-exposure height and balance, stored in compact int64
+    arrays addressed through an address -> slot dict. Every update is O(1);
+    the running total and a per-exposure-height value histogram make the
+    aggregate queries independent of the number of addresses.
+    """
+    NOT_EXPOSED = -1
+
     def __init__(self):
+        self.slot: Dict[str, int] = {}
+        self.first_exposed = array("q")
+        self.balance = array("q")
+        self.exposed_count = 0
+        self.exposed_value = 0
+        self._value_by_height: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.slot)
+
+    def _slot(self, addr: str) -> int:
+        i = self.slot.get(addr)
+        if i is None:
+            i = self.slot[addr] = len(self.balance)
+            self.first_exposed.append(self.NOT_EXPOSED)
+            self.balance.append(0)
+        return i
+
+    def credit(self, addr: str, amount: int):
+        """Balance change of `addr` (negative for debits)."""
+        i = self._slot(addr)
+        self.balance[i] += amount
+        h = self.first_exposed[i]
+        if h != self.NOT_EXPOSED:
+            self.exposed_value += amount
+            self._value_by_height[h] += amount
+
+    def expose(self, addr: str, height: int):
+        """Record that the pubkey behind `addr` became public at `height`."""
+        i = self._slot(addr)
+        if self.first_exposed[i] != self.NOT_EXPOSED:
+            return
+        self.first_exposed[i] = height
+        self.exposed_count += 1
+        self.exposed_value += self.balance[i]
+        self._value_by_height[height] = self._value_by_height.get(height, 0) + self.balance[i]
+
+    def first_exposure(self, addr: str) -> Optional[int]:
+        i = self.slot.get(addr)
+        if i is None or self.first_exposed[i] == self.NOT_EXPOSED:
+            return None
+        return self.first_exposed[i]
+
+    def at_risk(self, addr: str) -> int:
+        """Value held by `addr` if its pubkey is exposed, else 0."""
+        i = self.slot.get(addr)
+        if i is None or self.first_exposed[i] == self.NOT_EXPOSED:
+            return 0
+        return self.balance[i]
+
+    def value_by_age(self, height: int, edges: Tuple[int, ...] = (0, 10, 100, 1000)) -> Dict[str, int]:
+        """
+        Exposed value bucketed by exposure age (height - first exposure height),
+        e.g. {"0-9": ..., "10-99": ..., "100-999": ..., "1000+": ...}.
+        """
+        labels = [f"{lo}-{hi - 1}" for lo, hi in zip(edges, edges[1:])] + [f"{edges[-1]}+"]
+        out = dict.fromkeys(labels, 0)
+        for h, value in self._value_by_height.items():
+            age = height - h
+            b = len(edges) - 1
+            while b > 0 and age < edges[b]:
+                b -= 1
+            out[labels[b]] += value
+        return out
+
+
+class Ledger:
+    def __init__(self, exposure: Optional[ExposureIndex] = None):
         self.balances: Dict[str, int] = {}
+        self.height = 0
+        self.exposure = exposure if exposure is not None else ExposureIndex()
+
+    def new_block(self):
+        self.height += 1
 
     def mint(self, addr: str, amount: int):
         self.balances[addr] = self.balances.get(addr, 0) + amount
+        self.exposure.credit(addr, amount)
 
     def apply(self, tx: Tx, curve: Curve, G: Point) -> bool:
-        if self.balances.get(tx.frm_addr, 0) < tx.amount:
-            print("  [Ledger] Reject: insufficient funds.")
-            return False
-
         # Spend requires pubkey + signature (reveals pubkey)
         if tx.pubkey is None or tx.sig is None:
             print("  [Ledger] Reject: missing pubkey/signature.")
@@ -181,9 +604,19 @@ class Ledger:
             print("  [Ledger] Reject: invalid signature.")
             return False
 
+        # A validly signed tx puts the pubkey behind frm_addr in public view,
+        # whether or not it can be paid
+        self.exposure.expose(tx.frm_addr, self.height)
+
+        if self.balances.get(tx.frm_addr, 0) < tx.amount:
+            print("  [Ledger] Reject: insufficient funds.")
+            return False
+
         # Apply transfer
         self.balances[tx.frm_addr] -= tx.amount
         self.balances[tx.to_addr] = self.balances.get(tx.to_addr, 0) + tx.amount
+        self.exposure.credit(tx.frm_addr, -tx.amount)
+        self.exposure.credit(tx.to_addr, tx.amount)
         print("  [Ledger] Accepted.")
         return True
 
@@ -192,11 +625,15 @@ class Ledger:
 # "Quantum" attacker = solves discrete log
 # -----------------------------------------
 
-def recover_private_key_by_dlog(curve: Curve, G: Point, Q: Point, max_k: int = 50_000) -> Optional[int]:
+def recover_private_key_by_dlog(curve: Curve, G: Point, Q: Point, max_k: int = 50_000,
+                                attacker: Optional["DlogAttacker"] = None) -> Optional[int]:
     """
     This brute force stands in for Shor's algorithm in the real world.
     On real curves, classical brute force is infeasible; Shor makes it feasible.
+    Pass `attacker` (see DlogAttacker below) to use a faster classical solver.
     """
+    if attacker is not None:
+        return attacker.solve(curve, G, Q)
     R = None
     for k in range(1, max_k + 1):
         R = add(curve, R, G)  # incremental k*G
@@ -205,6 +642,247 @@ def recover_private_key_by_dlog(curve: Curve, G: Point, Q: Point, max_k: int = 5
     return None
 
 
+# -----------------------------------------
+# Classical discrete-log attackers
+# -----------------------------------------
+#
+# Every attacker exposes the same interface:
+#     attacker.solve(curve, G, Q) -> Optional[int]   (k with k*G == Q)
+#     attacker.stats                                  (cost of the last solve)
+# so the demo, benchmarks and simulators can swap them freely.
+#   linear scan : O(n) time, O(1) memory   (the original brute force)
+#   BSGS        : O(sqrt n) time, O(sqrt n) memory
+#   Pollard rho : O(sqrt n) time, O(#distinguished points) memory, parallel
+
+@dataclass
+class AttackStats:
+    group_ops: int = 0      # point additions/doublings performed
+    table_size: int = 0     # entries kept in memory (baby steps / distinguished points)
+    seconds: float = 0.0
+
+
+class DlogAttacker:
+    name = "base"
+
+    def __init__(self):
+        self.stats = AttackStats()
+
+    def solve(self, curve: Curve, G: Point, Q: Point) -> Optional[int]:
+        raise NotImplementedError
+
+
+def hasse_bound(curve: Curve) -> int:
+    """Upper bound p + 1 + 2*sqrt(p) on the number of points of the curve."""
+    return curve.p + 1 + 2 * isqrt(curve.p) + 2
+
+
+class LinearScanAttacker(DlogAttacker):
+    name = "linear"
+
+    def __init__(self, max_k: Optional[int] = None):
+        super().__init__()
+        self.max_k = max_k
+
+    def solve(self, curve: Curve, G: Point, Q: Point) -> Optional[int]:
+        t0 = time.perf_counter()
+        max_k = self.max_k if self.max_k is not None else hasse_bound(curve)
+        k = recover_private_key_by_dlog(curve, G, Q, max_k=max_k)
+        self.stats = AttackStats(group_ops=k if k is not None else max_k,
+                                 seconds=time.perf_counter() - t0)
+        return k
+
+
+class BabyStepGiantStepAttacker(DlogAttacker):
+    """
+    Shanks' baby-step/giant-step: store j*G for j < m in a hash table, then walk
+    Q - i*(m*G) until it hits the table. m = ceil(sqrt(n)) where n bounds ord(G)
+    (the Hasse bound when the order is not given).
+    """
+    name = "bsgs"
+
+    def __init__(self, order: Optional[int] = None):
+        super().__init__()
+        self.order = order
+
+    def solve(self, curve: Curve, G: Point, Q: Point) -> Optional[int]:
+        t0 = time.perf_counter()
+        n = self.order if self.order is not None else hasse_bound(curve)
+        m = isqrt(n - 1) + 1
+        ops = 0
+
+        baby: Dict[Point, int] = {}
+        R = None
+        for j in range(m):
+            baby.setdefault(R, j)
+            R = add(curve, R, G)
+            ops += 1
+
+        step = neg(curve, mul(curve, m, G))
+        gamma = Q
+        k = None
+        for i in range(m + 1):
+            j = baby.get(gamma)
+            if j is not None and i * m + j > 0:
+                k = i * m + j
+                break
+            gamma = add(curve, gamma, step)
+            ops += 1
+
+        self.stats = AttackStats(group_ops=ops, table_size=len(baby),
+                                 seconds=time.perf_counter() - t0)
+        return k
+
+
+def point_order_by_bsgs(curve: Curve, G: Point) -> int:
+    """ord(G) = dlog(-G) + 1, found with BSGS in O(sqrt p)."""
+    if G is None:
+        return 1
+    k = BabyStepGiantStepAttacker().solve(curve, G, neg(curve, G))
+    if k is None:
+        raise RuntimeError("could not determine the order of G")
+    return k + 1
+
+
+def _rho_walk_batch(curve: Curve, G: Point, Q: Point, n: int,
+                    steps: List[Tuple[Point, int, int]], dp_mask: int,
+                    max_walk: int, walks: int, seed: int):
+    """
+    Worker for parallel Pollard rho (van Oorschot–Wiener).
+    Runs `walks` r-adding walks from random a*G + b*Q starts and returns every
+    distinguished point (x & dp_mask == 0) hit as (point, a, b), plus the op count.
+    """
+    rng = random.Random(seed)
+    r = len(steps)
+    found = []
+    ops = 0
+    for _ in range(walks):
+        a, b = rng.randrange(n), rng.randrange(n)
+        X = mul2(curve, a, G, b, Q)
+        ops += n.bit_length() * 7 // 5   # approx. cost of the start multiplication
+        for _ in range(max_walk):
+            if X is not None and X[0] & dp_mask == 0:
+                found.append((X, a, b))
+                break
+            M, ma, mb = steps[(X[0] if X is not None else 0) % r]
+            X = add(curve, X, M)
+            a = (a + ma) % n
+            b = (b + mb) % n
+            ops += 1
+    return found, ops
+
+
+class PollardRhoAttacker(DlogAttacker):
+    """
+    Pollard rho with distinguished points. Walks are independent, so batches of
+    them are farmed out to a process pool and the parent only keeps the
+    distinguished points; a repeated point with different (a, b) yields
+        a1 + b1*k == a2 + b2*k  (mod n)  =>  k = (a1 - a2) / (b2 - b1).
+    workers=1 runs everything in-process. The search gives up (None) when n*G or
+    n*Q is not O, or once max_ops group operations are used up (checked between
+    batches of walks; default 16*sqrt(n) scaled by the per-walk start-up cost,
+    several times the expected work).
+    """
+    name = "rho"
+
+    def __init__(self, order: Optional[int] = None, workers: int = 1,
+                 dp_bits: Optional[int] = None, r: int = 20,
+                 walks_per_task: int = 8, seed: Optional[int] = None,
+                 max_ops: Optional[int] = None):
+        super().__init__()
+        self.order = order
+        self.max_ops = max_ops
+        self.workers = workers
+        self.dp_bits = dp_bits
+        self.r = r
+        self.walks_per_task = walks_per_task
+        self.seed = seed
+
+    def _candidates(self, curve: Curve, G: Point, Q: Point, n: int,
+                    da: int, db: int) -> Optional[int]:
+        # da == k * db (mod n); db need not be invertible when n is composite
+        g = gcd(db, n)
+        if da % g != 0:
+            return None
+        n_g = n // g
+        k0 = (da // g) * pow(db // g, -1, n_g) % n_g if n_g > 1 else 0
+        for t in range(g):
+            k = k0 + t * n_g
+            if mul(curve, k, G) == Q:
+                return k
+        return None
+
+    def solve(self, curve: Curve, G: Point, Q: Point) -> Optional[int]:
+        t0 = time.perf_counter()
+        if Q is None:
+            return None
+        n = self.order if self.order is not None else point_order_by_bsgs(curve, G)
+        if mul(curve, n, G) is not None or mul(curve, n, Q) is not None:
+            self.stats = AttackStats(seconds=time.perf_counter() - t0)
+            return None                 # wrong order, or Q is not in <G>
+        rng = random.Random(self.seed)
+        dp_bits = self.dp_bits if self.dp_bits is not None else max(0, n.bit_length() // 4 - 1)
+        dp_mask = (1 << dp_bits) - 1
+        max_walk = 20 << dp_bits
+        budget = self.max_ops
+        if budget is None:
+            start_cost = n.bit_length() * 7 // 5
+            budget = 16 * (isqrt(n) + 1) * (1 + start_cost // (1 << dp_bits))
+
+        steps = []
+        for _ in range(self.r):
+            ma, mb = rng.randrange(n), rng.randrange(n)
+            steps.append((mul2(curve, ma, G, mb, Q), ma, mb))
+
+        seen: Dict[Point, Tuple[int, int]] = {}
+        ops = 0
+        k = None
+
+        def absorb(batch) -> Optional[int]:
+            for X, a, b in batch:
+                prev = seen.get(X)
+                if prev is None:
+                    seen[X] = (a, b)
+                    continue
+                if (prev[1] - b) % n == 0:
+                    continue
+                sol = self._candidates(curve, G, Q, n, (a - prev[0]) % n, (prev[1] - b) % n)
+                if sol is not None:
+                    return sol
+            return None
+
+        args = (curve, G, Q, n, steps, dp_mask, max_walk, self.walks_per_task)
+        if self.workers <= 1:
+            while k is None and ops < budget:
+                batch, used = _rho_walk_batch(*args, rng.getrandbits(64))
+                ops += used
+                k = absorb(batch)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pending = {pool.submit(_rho_walk_batch, *args, rng.getrandbits(64))
+                           for _ in range(2 * self.workers)}
+                while k is None and pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        batch, used = fut.result()
+                        ops += used
+                        k = k if k is not None else absorb(batch)
+                        if k is None and ops < budget:
+                            pending.add(pool.submit(_rho_walk_batch, *args, rng.getrandbits(64)))
+                for fut in pending:
+                    fut.cancel()
+
+        self.stats = AttackStats(group_ops=ops, table_size=len(seen),
+                                 seconds=time.perf_counter() - t0)
+        return k
+
+
+ATTACKERS = {
+    LinearScanAttacker.name: LinearScanAttacker,
+    BabyStepGiantStepAttacker.name: BabyStepGiantStepAttacker,
+    PollardRhoAttacker.name: PollardRhoAttacker,
+}
+
+
 # -------------
 # Demo runner
 # -------------
@@ -220,10 +898,12 @@ def main():
     print("\n=== Curve Setup ===")
     print(f"Curve: y^2 = x^3 + {curve.a}x + {curve.b} (mod {curve.p})")
     print(f"Chosen generator point G: {G}")
+    N = curve_order(curve)
+    print(f"Curve order #E = {N}, ord(G) = {point_order(curve, G, N)}")
 
     # Wallet owner (Alice)
     alice_d = 20  # small for quick demo
-    alice_Q = mul(curve, alice_d, G)
+    alice_Q = mul_base(curve, alice_d, G)
     alice_addr = address_from_pubkey(alice_Q)
     alice = Wallet(d=alice_d, Q=alice_Q, address=alice_addr)
 
@@ -297,6 +977,11 @@ def main():
     print(f"Bob balance   : {ledger.balances.get(bob_addr, 0)}")
     print(f"Eve balance   : {ledger.balances.get(eve_addr, 0)}")
 
+    print("\n=== Exposed-pubkey index ===")
+    print(f"Addresses with revealed pubkey : {ledger.exposure.exposed_count}")
+    print(f"Value still behind them        : {ledger.exposure.exposed_value}")
+    print(f"Alice first exposed at height  : {ledger.exposure.first_exposure(alice.address)}")
+
     print("\nTakeaway:")
     print(" - On real curves, classical brute force is infeasible.")
     print(" - Shor makes 'recover d from Q' feasible => signatures become forgeable.")